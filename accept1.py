@@ -1,26 +1,42 @@
 # app_workflow.py
 import streamlit as st
 import pandas as pd
-import joblib
 import os
 import io
+import tempfile
 import traceback
 
+import metrics
+import model_store
+from batch_scoring import CHUNK_SIZE, iter_scored_chunks, read_csv_chunks
+from cv_cache import DEFAULT_DB_PATH as DEFAULT_CV_DB_PATH, CVCache
+from evaluation_view import render_live_evaluation
+from inference import DEFAULT_THRESHOLD
+from prediction_cache import predict_one_cached, prediction_cache
+import profiling
+from profiling import profiler
+
 st.set_page_config(page_title="PhD Research — Student Performance & Workflow", layout="wide")
 
+# Prometheus-style metrics on 127.0.0.1:9464/metrics (see metrics.py)
+metrics.start_metrics_server()
+
 # -------------------------
 # Utility: Safe model load
 # -------------------------
 def load_model_from_path(path):
     try:
-        m = joblib.load(path)
+        m = model_store.load_model(path)
         return m, None
     except Exception as e:
         return None, e
 
 def save_uploaded_file(uploaded_file, target_path):
-    with open(target_path, "wb") as f:
+    # write then rename: another process may be reading the current artifact
+    tmp_path = f"{target_path}.upload"
+    with open(tmp_path, "wb") as f:
         f.write(uploaded_file.getbuffer())
+    os.replace(tmp_path, target_path)
     return target_path
 
 # -------------------------
@@ -28,6 +44,7 @@ def save_uploaded_file(uploaded_file, target_path):
 # -------------------------
 DEFAULT_MODEL_PATH = "stacking_model.pkl"
 model = None
+model_path = DEFAULT_MODEL_PATH
 model_load_error = None
 
 if os.path.exists(DEFAULT_MODEL_PATH):
@@ -56,6 +73,11 @@ st.markdown("""
 st.sidebar.header("Model Status")
 if model is not None:
     st.sidebar.success(f"Model loaded from `{DEFAULT_MODEL_PATH}`")
+    info = model_store.model_info(DEFAULT_MODEL_PATH)
+    if info is not None:
+        rss = f", RSS +{info['rss_delta_bytes'] / 2**20:.1f} MB" if info["rss_delta_bytes"] is not None else ""
+        mode = "compressed" if info["compressed"] else "uncompressed"
+        st.sidebar.caption(f"Loaded {mode} artifact in {info['load_seconds']:.2f}s ({info['size_bytes'] / 2**20:.1f} MB on disk{rss}), sha256 {info['sha256'][:12]}")
 else:
     st.sidebar.error("No working model loaded")
     if model_load_error is not None:
@@ -71,13 +93,48 @@ if uploaded:
     new_model, err = load_model_from_path(target)
     if new_model:
         model = new_model
+        model_path = target
         st.sidebar.success(f"Uploaded model loaded: {uploaded.name}")
     else:
         st.sidebar.error(f"Uploaded file failed to load: {err}")
         st.sidebar.exception(traceback.format_exc())
 
+cache_stats = prediction_cache.stats()
+st.sidebar.caption(f"Prediction cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                   f"({cache_stats['size']}/{cache_stats['capacity']} entries)")
+
+# -------------------------
+# Sidebar: Diagnostics (opt-in inference profiling)
+# -------------------------
+with st.sidebar.expander("🩺 Diagnostics"):
+    profile_on = st.checkbox("Profile inference", value=st.session_state.get("profile_on", False),
+                             help="Time the feature build, every base learner and the meta-learner on each prediction. "
+                                  "Profiling stays on while any session has it checked.")
+    # the profiler and the cached model are shared by every session: only
+    # take or drop this session's hold when the checkbox or the model changes
+    was_on = st.session_state.get("profile_on", False)
+    profiled_model = st.session_state.get("profiled_model")
+    if was_on and (not profile_on or profiled_model is not model):
+        profiling.release(profiled_model)
+        st.session_state["profiled_model"] = None
+    if profile_on and (not was_on or profiled_model is not model):
+        profiling.acquire(model)
+        st.session_state["profiled_model"] = model
+    st.session_state["profile_on"] = profile_on
+    if st.button("Reset timings"):
+        profiler.reset()
+    timings = profiler.snapshot()
+    if timings:
+        st.dataframe(pd.DataFrame(timings)[["component", "calls", "rows", "max_batch", "mean_ms", "ms_per_row"]]
+                     .style.format({"mean_ms": "{:.2f}", "ms_per_row": "{:.3f}"}), use_container_width=True)
+        st.download_button("Export JSON", profiler.to_json(), file_name="inference_profile.json", mime="application/json")
+    elif profile_on:
+        st.caption("No predictions profiled yet.")
+
 st.sidebar.markdown("---")
-st.sidebar.info("If you still see EOFError, re-create the .pkl using `joblib.dump(model, 'stacking_model.pkl', compress=3)` on your training machine and upload via sidebar.")
+st.sidebar.info("If you still see EOFError, re-create the .pkl on your training machine and upload via sidebar. "
+                "Every app and scorer process holds its own copy of the model (about 110 MB for the full stack), "
+                "whether it was saved compressed or with `python model_store.py export model.pkl stacking_model.pkl`.")
 
 # -------------------------
 # Page layout: header & nav
@@ -89,11 +146,12 @@ st.markdown("---")
 # -------------------------
 # Top-level tabs
 # -------------------------
-tab_main, tab_workflow, tab_models, tab_predict = st.tabs([
+tab_main, tab_workflow, tab_models, tab_predict, tab_batch = st.tabs([
     "Overview",
     "📘 Research Workflow (Steps 1–5)",
     "📊 Model Results & Exports",
-    "🔮 Predict Student"
+    "🔮 Predict Student",
+    "📦 Batch Scoring"
 ])
 
 # -------------------------
@@ -237,16 +295,28 @@ ROC AUC: 0.907
 with tab_models:
     st.header("Model Performance Summary")
 
-    # create the DataFrame from the summary provided
-    summary = pd.DataFrame({
-        "Model": ["LogisticRegression","RandomForest","GradientBoosting","MLP","SVM","XGBoost"],
-        "Best_CV_F1": [0.85, 0.86, 0.86, 0.85, 0.86, 0.86],
-        "Accuracy": [0.78, 0.80, 0.80, 0.79, 0.80, 0.80],
-        "Precision": [0.81, 0.83, 0.83, 0.82, 0.83, 0.82],
-        "Recall": [0.85, 0.85, 0.86, 0.84, 0.85, 0.86],
-        "F1": [0.83, 0.84, 0.84, 0.83, 0.84, 0.84],
-        "ROC_AUC": [0.86, 0.89, 0.89, 0.88, 0.89, 0.89],
-    })
+    # built from the cross-validation result cache when train.py has filled it,
+    # otherwise the summary reported in the thesis
+    summary = None
+    if os.path.exists(DEFAULT_CV_DB_PATH):
+        try:
+            cv_store = CVCache(DEFAULT_CV_DB_PATH)
+            summary = cv_store.summary()
+            cv_store.close()
+        except Exception as e:
+            st.warning(f"Could not read the CV result cache: {e}")
+    if summary is not None and len(summary):
+        st.caption(f"Cross-validated means of each model's best candidate, from `{DEFAULT_CV_DB_PATH}`.")
+    else:
+        summary = pd.DataFrame({
+            "Model": ["LogisticRegression","RandomForest","GradientBoosting","MLP","SVM","XGBoost"],
+            "Best_CV_F1": [0.85, 0.86, 0.86, 0.85, 0.86, 0.86],
+            "Accuracy": [0.78, 0.80, 0.80, 0.79, 0.80, 0.80],
+            "Precision": [0.81, 0.83, 0.83, 0.82, 0.83, 0.82],
+            "Recall": [0.85, 0.85, 0.86, 0.84, 0.85, 0.86],
+            "F1": [0.83, 0.84, 0.84, 0.83, 0.84, 0.84],
+            "ROC_AUC": [0.86, 0.89, 0.89, 0.88, 0.89, 0.89],
+        })
 
     st.dataframe(summary.style.format({
         "Best_CV_F1":"{:.2f}","Accuracy":"{:.2f}","Precision":"{:.2f}","Recall":"{:.2f}","F1":"{:.2f}","ROC_AUC":"{:.2f}"
@@ -255,6 +325,13 @@ with tab_models:
     st.markdown("**Classification reports** (sample excerpts shown in Workflow tab).")
     st.markdown("---")
 
+    st.subheader("Live evaluation of the loaded model")
+    if model is not None:
+        render_live_evaluation(model_path)
+    else:
+        st.info("Load a model to evaluate it on the held-out set.")
+    st.markdown("---")
+
     # Provide export buttons
     csv = summary.to_csv(index=False).encode("utf-8")
     st.download_button("Download model_results.csv", data=csv, file_name="model_results.csv", mime="text/csv")
@@ -267,6 +344,55 @@ with tab_models:
     except Exception:
         st.info("Install openpyxl to enable XLSX export (app will continue to function without it).")
 
+# -------------------------
+# Batch scoring tab (rendered before the prediction tab, which may st.stop())
+# -------------------------
+with tab_batch:
+    st.header("📦 Batch Scoring (CSV)")
+    st.markdown("Upload a `ds1.csv`-shaped file (`student_id`, the 15 IDE counters and `which_time_span`). "
+                "Rows are scored in fixed-size chunks; the uploaded file and the scored output are still held "
+                "in memory while they are uploaded and downloaded, so very large cohorts belong in `score_cohort.py`.")
+    if model is None:
+        st.error("No usable model loaded. Use the sidebar to upload a valid `stacking_model.pkl` or fix the existing file.")
+    else:
+        batch_file = st.file_uploader("Upload cohort CSV", type=["csv"], key="b_csv")
+        b_col1, b_col2 = st.columns(2)
+        with b_col1:
+            chunk_size = st.number_input("Rows per chunk", min_value=100, max_value=100000, value=CHUNK_SIZE, step=100, key="b_chunk")
+        with b_col2:
+            batch_threshold = st.slider("Decision threshold (Pass probability)", min_value=0.05, max_value=0.95, value=DEFAULT_THRESHOLD, step=0.05, key="b_threshold")
+
+        if batch_file is not None and st.button("📦 Score file", use_container_width=True, key="b_go"):
+            st.session_state.pop("batch_result", None)
+            # one directory per session, removed with it (TemporaryDirectory cleans up when collected)
+            if "batch_dir" not in st.session_state:
+                st.session_state["batch_dir"] = tempfile.TemporaryDirectory(prefix="mlincs-batch-")
+            out_path = os.path.join(st.session_state["batch_dir"].name, "scores.csv")
+
+            progress = st.progress(0.0, text="Scoring...")
+            n_rows = 0
+            try:
+                with open(out_path, "w", newline="") as out:
+                    chunks = read_csv_chunks(batch_file, int(chunk_size))
+                    for i, scored in enumerate(iter_scored_chunks(model, chunks, batch_threshold)):
+                        scored.to_csv(out, header=(i == 0), index=False)
+                        n_rows += len(scored)
+                        done = min(batch_file.tell() / max(batch_file.size, 1), 1.0)
+                        progress.progress(done, text=f"Scored {n_rows:,} rows")
+                progress.progress(1.0, text=f"Scored {n_rows:,} rows")
+                st.session_state["batch_result"] = {"path": out_path, "rows": n_rows, "source": batch_file.name}
+            except Exception:
+                if os.path.exists(out_path):
+                    os.remove(out_path)
+                st.error("Failed to score file — check that it has the ds1.csv columns.")
+                st.exception(traceback.format_exc())
+
+        result = st.session_state.get("batch_result")
+        if result and os.path.exists(result["path"]):
+            st.success(f"Scored {result['rows']:,} students from `{result['source']}`")
+            with open(result["path"], "rb") as f:
+                st.download_button("Download scores.csv", data=f, file_name="scores.csv", mime="text/csv", key="b_download")
+
 # -------------------------
 # Prediction tab
 # -------------------------
@@ -307,82 +433,25 @@ with tab_predict:
     time_span_label = st.selectbox("Select Time Span", ["Early", "Mid", "End"], key="p_timespan")
     time_span_map = {"Early":1,"Mid":2,"End":3}
     which_time_span_encoded = time_span_map[time_span_label]
+    threshold = st.slider("Decision threshold (Pass probability)", min_value=0.05, max_value=0.95, value=DEFAULT_THRESHOLD, step=0.05, key="p_threshold")
 
     if st.button("🔮 Predict", use_container_width=True):
-        # derive features safely (avoid zero division)
-        def safe_div(a,b):
-            return (a / b) if b != 0 else 0
-
-        easy_completion_ratio = safe_div(completed_easy_exercise, total_easy_exercise)
-        medium_completion_ratio = safe_div(completed_medium_exercise, total_medium_exercise)
-        hard_completion_ratio = safe_div(completed_hard_exercise, total_hard_exercise)
-
-        easy_effort_efficiency = safe_div(easy_exercise_completion_time, (completed_easy_exercise + 1))
-        medium_effort_efficiency = safe_div(medium_exercise_completion_time, (completed_medium_exercise + 1))
-        hard_effort_efficiency = safe_div(hard_exercise_completion_time, (completed_hard_exercise + 1))
-
-        easy_error_rate = safe_div(easy_exercise_syntax_error, (easy_exercise_attempt + 1))
-        medium_error_rate = safe_div(medium_exercise_syntax_error, (medium_exercise_attempt + 1))
-        hard_error_rate = safe_div(hard_exercise_syntax_error, (hard_exercise_attempt + 1))
-
-        completed_weighted_score = (completed_easy_exercise*1 + completed_medium_exercise*2 + completed_hard_exercise*3)
-        attempts_weighted_score = (easy_exercise_attempt*1 + medium_exercise_attempt*2 + hard_exercise_attempt*3)
-        syntax_error_weighted_score = (easy_exercise_syntax_error*1 + medium_exercise_syntax_error*2 + hard_exercise_syntax_error*3)
-        total_completed_all = completed_easy_exercise + completed_medium_exercise + completed_hard_exercise
-        total_attempt_all = easy_exercise_attempt + medium_exercise_attempt + hard_exercise_attempt
-        total_error_all = easy_exercise_syntax_error + medium_exercise_syntax_error + hard_exercise_syntax_error
-        overall_efficiency = safe_div(total_completed_all, (total_attempt_all + 1))
-
-        x = {
-            "total_easy_exercise": total_easy_exercise,
-            "completed_easy_exercise": completed_easy_exercise,
-            "easy_exercise_completion_time": easy_exercise_completion_time,
-            "easy_exercise_attempt": easy_exercise_attempt,
-            "easy_exercise_syntax_error": easy_exercise_syntax_error,
-            "total_medium_exercise": total_medium_exercise,
-            "completed_medium_exercise": completed_medium_exercise,
-            "medium_exercise_completion_time": medium_exercise_completion_time,
-            "medium_exercise_attempt": medium_exercise_attempt,
-            "medium_exercise_syntax_error": medium_exercise_syntax_error,
-            "total_hard_exercise": total_hard_exercise,
-            "completed_hard_exercise": completed_hard_exercise,
-            "hard_exercise_completion_time": hard_exercise_completion_time,
-            "hard_exercise_attempt": hard_exercise_attempt,
-            "hard_exercise_syntax_error": hard_exercise_syntax_error,
-            "easy_completion_ratio": easy_completion_ratio,
-            "medium_completion_ratio": medium_completion_ratio,
-            "hard_completion_ratio": hard_completion_ratio,
-            "easy_effort_efficiency": easy_effort_efficiency,
-            "medium_effort_efficiency": medium_effort_efficiency,
-            "hard_effort_efficiency": hard_effort_efficiency,
-            "easy_error_rate": easy_error_rate,
-            "medium_error_rate": medium_error_rate,
-            "hard_error_rate": hard_error_rate,
-            "completed_weighted_score": completed_weighted_score,
-            "attempts_weighted_score": attempts_weighted_score,
-            "syntax_error_weighted_score": syntax_error_weighted_score,
-            "which_time_span_encoded": which_time_span_encoded,
-            "total_completed_all": total_completed_all,
-            "total_attempt_all": total_attempt_all,
-            "total_error_all": total_error_all,
-            "overall_efficiency": overall_efficiency,
-        }
-
-        df_pred = pd.DataFrame([x])
+        raw = [[
+            total_easy_exercise, completed_easy_exercise, easy_exercise_completion_time, easy_exercise_attempt, easy_exercise_syntax_error,
+            total_medium_exercise, completed_medium_exercise, medium_exercise_completion_time, medium_exercise_attempt, medium_exercise_syntax_error,
+            total_hard_exercise, completed_hard_exercise, hard_exercise_completion_time, hard_exercise_attempt, hard_exercise_syntax_error,
+            which_time_span_encoded,
+        ]]
         try:
-            prediction = model.predict(df_pred)[0]
-            prob = None
-            if hasattr(model, "predict_proba"):
-                try:
-                    prob = model.predict_proba(df_pred)[0][1]
-                except Exception:
-                    prob = None
-
-            st.markdown(f"<div class='glass'><strong>Prediction:</strong> <span style='font-size:20px'>{prediction}</span></div>", unsafe_allow_html=True)
-            if prob is not None:
-                st.markdown(f"<div class='glass'><strong>Success Probability:</strong> {prob:.2f}</div>", unsafe_allow_html=True)
-            else:
-                st.info("Model does not expose predict_proba. Only class label shown.")
+            with metrics.track_request("accept1"):
+                prediction, prob = predict_one_cached(raw, model_path, threshold)
+
+                with metrics.stage("render"):
+                    st.markdown(f"<div class='glass'><strong>Prediction:</strong> <span style='font-size:20px'>{prediction}</span></div>", unsafe_allow_html=True)
+                    if prob is not None:
+                        st.markdown(f"<div class='glass'><strong>Success Probability:</strong> {prob:.2f}</div>", unsafe_allow_html=True)
+                    else:
+                        st.info("Model does not expose predict_proba. Only class label shown.")
         except Exception as e:
             st.error("Failed to run prediction — model may be incompatible with current feature set.")
             st.exception(traceback.format_exc())
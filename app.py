@@ -1,11 +1,12 @@
 import streamlit as st
-import pandas as pd
-import joblib
 
 # ---------------------------------------------------------
-# LOAD ML MODEL
+# ML MODEL
 # ---------------------------------------------------------
-model = joblib.load("stacking_model.pkl")
+# Loaded lazily: sklearn/xgboost and the ensemble are only imported when the
+# "ML Prediction App" page is opened (or by the background warm-up that the
+# research page starts after it has rendered).
+MODEL_PATH = "stacking_model.pkl"
 
 # ---------------------------------------------------------
 # GLOBAL UI STYLING
@@ -152,25 +153,43 @@ if page == "Research Overview":
     st.markdown("---")
     st.markdown("© 2025 – RBS | Academic Research Use Only")
     
-    st.markdown("---") 
-    st.header("Machine Learning Evaluation Graphs") 
-    import os 
-    from PIL import Image 
-    graph_files = { "Class Distribution (Pass vs Fail)": "Class Distribution (Pass vs Fail).png", "Confusion Matrix": "Confusion Matrix.png", "Learning Curve": "Learning Curve.png", "Precision–Recall Curve": "Precision-Recall Curve.png", "ROC Curve with AUC": "ROC Curve with AUC.png", "Top 15 Feature Importances — Random Forest": "Top 15 Feature Importance - Random Forest.png", "Top 15 Feature Importances — XGBoost": "Top 15 Feature Importance - XGBoost.png", } 
-    for title, path in graph_files.items(): 
-        st.subheader(f"{title}") 
-        if os.path.exists(path): 
-            img = Image.open(path) 
-            st.image(img, use_container_width=True) 
-        else: 
+    st.markdown("---")
+    st.header("Machine Learning Evaluation Graphs")
+    # only the selected charts are decoded/sent; assets caches display-sized copies
+    from assets import GRAPH_FILES, display_image
+    selected_graphs = st.multiselect(
+        "Show graphs",
+        list(GRAPH_FILES),
+        default=["Confusion Matrix", "ROC Curve with AUC"],
+    )
+    for title in selected_graphs:
+        path = GRAPH_FILES[title]
+        st.subheader(f"{title}")
+        try:
+            st.image(display_image(path), use_container_width=True)
+        except FileNotFoundError:
             st.error(f"File not found: {path}")
 
+    # page is painted; load the ML stack in the background for the prediction page
+    from warmup import start_background_warmup
+    start_background_warmup(MODEL_PATH)
+
 
 # =====================================================================
 # ======================  PAGE 2 — ML PREDICTION APP  ==================
 # =====================================================================
 if page == "ML Prediction App":
 
+    import metrics
+    from model_store import load_model
+    from prediction_cache import predict_one_cached
+
+    # Prometheus-style metrics on 127.0.0.1:9464/metrics (see metrics.py)
+    metrics.start_metrics_server()
+
+    with st.spinner("Loading prediction model..."):
+        model = load_model(MODEL_PATH)
+
     st.markdown("<div class='title'>Student Performance Prediction</div>", unsafe_allow_html=True)
 
     # ---------- INPUT COLUMNS ----------
@@ -216,55 +235,24 @@ if page == "ML Prediction App":
 
     if predict_btn:
 
-        x = {
-            "total_easy_exercise": total_easy_exercise,
-            "completed_easy_exercise": completed_easy_exercise,
-            "easy_exercise_completion_time": easy_exercise_completion_time,
-            "easy_exercise_attempt": easy_exercise_attempt,
-            "easy_exercise_syntax_error": easy_exercise_syntax_error,
-            "total_medium_exercise": total_medium_exercise,
-            "completed_medium_exercise": completed_medium_exercise,
-            "medium_exercise_completion_time": medium_exercise_completion_time,
-            "medium_exercise_attempt": medium_exercise_attempt,
-            "medium_exercise_syntax_error": medium_exercise_syntax_error,
-            "total_hard_exercise": total_hard_exercise,
-            "completed_hard_exercise": completed_hard_exercise,
-            "hard_exercise_completion_time": hard_exercise_completion_time,
-            "hard_exercise_attempt": hard_exercise_attempt,
-            "hard_exercise_syntax_error": hard_exercise_syntax_error,
-            "easy_completion_ratio": completed_easy_exercise / total_easy_exercise if total_easy_exercise else 0,
-            "medium_completion_ratio": completed_medium_exercise / total_medium_exercise if total_medium_exercise else 0,
-            "hard_completion_ratio": completed_hard_exercise / total_hard_exercise if total_hard_exercise else 0,
-            "easy_effort_efficiency": easy_exercise_completion_time / completed_easy_exercise + 1 if completed_easy_exercise else 1,
-            "medium_effort_efficiency": medium_exercise_completion_time / completed_medium_exercise + 1 if completed_medium_exercise else 1,
-            "hard_effort_efficiency": hard_exercise_completion_time / completed_hard_exercise + 1 if completed_hard_exercise else 1,
-            "easy_error_rate": easy_exercise_syntax_error / easy_exercise_attempt + 1 if easy_exercise_attempt else 1,
-            "medium_error_rate": medium_exercise_syntax_error / medium_exercise_attempt + 1 if medium_exercise_attempt else 1,
-            "hard_error_rate": hard_exercise_syntax_error / hard_exercise_attempt + 1 if hard_exercise_attempt else 1,
-            "completed_weighted_score": completed_easy_exercise*1 + completed_medium_exercise*2 + completed_hard_exercise*3,
-            "attempts_weighted_score": easy_exercise_attempt*1 + medium_exercise_attempt*2 + hard_exercise_attempt*3,
-            "syntax_error_weighted_score": easy_exercise_syntax_error*1 + medium_exercise_syntax_error*2 + hard_exercise_syntax_error*3,
-            "which_time_span_encoded": which_time_span_encoded,
-            "total_completed_all": completed_easy_exercise + completed_medium_exercise + completed_hard_exercise,
-            "total_attempt_all": easy_exercise_attempt + medium_exercise_attempt + hard_exercise_attempt,
-            "total_error_all": easy_exercise_syntax_error + medium_exercise_syntax_error + hard_exercise_syntax_error,
-            "overall_efficiency": (
-                (completed_easy_exercise + completed_medium_exercise + completed_hard_exercise) /
-                (easy_exercise_attempt + medium_exercise_attempt + hard_exercise_attempt) + 1
-            ) if (easy_exercise_attempt + medium_exercise_attempt + hard_exercise_attempt) else 1,
-        }
-
-        df = pd.DataFrame([x])
-    
-        # numeric → pass/fail mapping
-        prediction_numeric = model.predict(df)[0]
-        label_mapping = {0: "Fail", 1: "Pass"}
-        prediction_label = label_mapping[prediction_numeric]
+        raw = [[
+            total_easy_exercise, completed_easy_exercise, easy_exercise_completion_time, easy_exercise_attempt, easy_exercise_syntax_error,
+            total_medium_exercise, completed_medium_exercise, medium_exercise_completion_time, medium_exercise_attempt, medium_exercise_syntax_error,
+            total_hard_exercise, completed_hard_exercise, hard_exercise_completion_time, hard_exercise_attempt, hard_exercise_syntax_error,
+            which_time_span_encoded,
+        ]]
     
-        st.markdown(
-            f"<div class='prediction-box'>Prediction: {prediction_label}</div>",
-            unsafe_allow_html=True
-        )
+        with metrics.track_request("app"):
+            # numeric → pass/fail mapping
+            prediction_numeric, _ = predict_one_cached(raw, MODEL_PATH)
+            label_mapping = {0: "Fail", 1: "Pass"}
+            prediction_label = label_mapping[prediction_numeric]
+
+            with metrics.stage("render"):
+                st.markdown(
+                    f"<div class='prediction-box'>Prediction: {prediction_label}</div>",
+                    unsafe_allow_html=True
+                )
 
 
 
@@ -0,0 +1,48 @@
+# assets.py
+# Evaluation graph assets for the research page.
+#
+# Each PNG is decoded at most once per file version and width (keyed by
+# mtime); only the display-sized, re-encoded variant is cached, as bytes, so
+# a Streamlit rerun neither touches PIL nor re-sends a full-size image, and
+# no full-resolution bitmap is kept after the variant is built.
+import io
+import os
+import threading
+
+GRAPH_FILES = {
+    "Class Distribution (Pass vs Fail)": "Class Distribution (Pass vs Fail).png",
+    "Confusion Matrix": "Confusion Matrix.png",
+    "Learning Curve": "Learning Curve.png",
+    "Precision–Recall Curve": "Precision-Recall Curve.png",
+    "ROC Curve with AUC": "ROC Curve with AUC.png",
+    "Top 15 Feature Importances — Random Forest": "Top 15 Feature Importance - Random Forest.png",
+    "Top 15 Feature Importances — XGBoost": "Top 15 Feature Importance - XGBoost.png",
+}
+
+DISPLAY_WIDTH = 700
+
+_lock = threading.Lock()
+_variants = {}  # (abs path, width) -> (mtime_ns, PNG bytes)
+
+
+def display_image(path, width=DISPLAY_WIDTH):
+    """PNG bytes of `path` scaled down to at most `width` pixels wide.
+
+    Raises FileNotFoundError if the image does not exist.
+    """
+    key = os.path.abspath(path)
+    mtime = os.stat(key).st_mtime_ns
+    with _lock:
+        hit = _variants.get((key, width))
+        if hit is not None and hit[0] == mtime:
+            return hit[1]
+
+        from PIL import Image
+        with Image.open(key) as img:
+            if img.width > width:
+                img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+            buf = io.BytesIO()
+            img.save(buf, format="PNG", optimize=True)
+        data = buf.getvalue()
+        _variants[(key, width)] = (mtime, data)
+        return data
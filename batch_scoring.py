@@ -0,0 +1,33 @@
+# batch_scoring.py
+# Chunked scoring of ds1.csv-shaped cohorts. Only one chunk of raw rows is
+# held in memory at a time, so peak memory depends on the chunk size and
+# not on the size of the file being scored.
+import pandas as pd
+
+from features import COUNTER_COLUMNS, build_feature_frame, raw_matrix
+from inference import predict_with_proba
+from profiling import profiler
+
+CHUNK_SIZE = 5000
+OUTPUT_COLUMNS = ["student_id", "label", "probability"]
+INPUT_COLUMNS = {"student_id", "which_time_span", "which_time_span_encoded", *COUNTER_COLUMNS}
+
+
+def read_csv_chunks(source, chunk_size=CHUNK_SIZE):
+    """Iterate over a CSV in DataFrame chunks, parsing only the columns scoring needs."""
+    return pd.read_csv(source, chunksize=chunk_size, usecols=lambda c: c in INPUT_COLUMNS)
+
+
+def score_frame(model, df, threshold=None):
+    """Score one chunk; returns student_id, label and probability columns."""
+    with profiler.section("features", len(df)):
+        X = build_feature_frame(raw_matrix(df))
+    labels, proba = predict_with_proba(model, X, threshold)
+    ids = df["student_id"].to_numpy() if "student_id" in df.columns else df.index.to_numpy()
+    return pd.DataFrame({"student_id": ids, "label": labels, "probability": proba}, columns=OUTPUT_COLUMNS)
+
+
+def iter_scored_chunks(model, chunks, threshold=None):
+    for chunk in chunks:
+        if len(chunk):
+            yield score_frame(model, chunk, threshold)
@@ -0,0 +1,86 @@
+# bench_startup.py
+# Cold-start benchmark for app.py.
+#
+#   python bench_startup.py [--repeat 3]
+#
+# Every measurement runs in a fresh interpreter so nothing is already
+# imported or cached:
+#   * research_first_paint: a full run of app.py on the default
+#     "Research Overview" page (streamlit.testing AppTest), plus which heavy
+#     ML modules were imported by the time the page finished rendering
+#     (the background warm-up is disabled for this run);
+#   * eager_model_load: importing joblib and unpickling the ensemble, i.e.
+#     the work the previous app.py did before it could render anything;
+#   * import times of the heavy libraries on their own. pandas is timed
+#     too but not counted as heavy: streamlit imports it itself, so it is
+#     always loaded by first paint.
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["sklearn", "xgboost", "joblib"]
+
+_FIRST_PAINT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+import warmup
+warmup.start_background_warmup = lambda *a, **k: None  # measure the page, not the warm-up thread
+start = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "errors": len(at.exception),
+                  "heavy_loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+_EAGER_LOAD = """
+import json, time
+start = time.perf_counter()
+import joblib
+joblib.load(%r)
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+_IMPORT = """
+import json, time
+start = time.perf_counter()
+import %s
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+
+def _run(code):
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _median(code, repeat):
+    runs = [_run(code) for _ in range(repeat)]
+    result = dict(runs[-1])
+    result["seconds"] = statistics.median(r["seconds"] for r in runs)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for app.py.")
+    parser.add_argument("--model", default="stacking_model.pkl")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    report = {
+        "research_first_paint": _median(_FIRST_PAINT % (HEAVY_MODULES,), args.repeat),
+        "eager_model_load": _median(_EAGER_LOAD % (args.model,), args.repeat),
+        "import_seconds": {m: _median(_IMPORT % m, args.repeat)["seconds"] for m in ["streamlit", "pandas"] + HEAVY_MODULES},
+    }
+    paint = report["research_first_paint"]["seconds"]
+    eager = report["eager_model_load"]["seconds"]
+    report["estimated_previous_first_paint"] = paint + eager
+    print(json.dumps(report, indent=2))
+    print(f"\nResearch page first paint: {paint:.2f}s (previously at least {paint + eager:.2f}s, "
+          f"the model load alone took {eager:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# cascade.py
+# Confidence-gated cascade: a cheap first stage answers the clear cases and
+# only uncertain rows reach the full stacking ensemble.
+#
+# Stage 1 is the model zoo's LogisticRegression pipeline (with its tuned C
+# from train.py's markers when available). Rows whose stage-1 P(pass) lies
+# outside (low, high) keep that probability; the rest are scored by the
+# full model. CascadeClassifier has classes_ / predict_proba / predict, so
+# the artifact is served through model_store and inference like
+# stacking_model.pkl:
+#
+#   python cascade.py --full stacking_model.pkl --output cascade_model.pkl --low 0.1 --high 0.9
+#
+# The report scores a range of bands on the held-out set: stage hit rates,
+# latency against the full model, and accuracy/F1/ROC AUC impact.
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+
+import model_store
+from distill import load_features
+from evaluation import HOLDOUT_PATH
+
+DEFAULT_OUTPUT = "cascade_model.pkl"
+DEFAULT_LOW = 0.1
+DEFAULT_HIGH = 0.9
+REPORT_BANDS = [(0.05, 0.95), (0.1, 0.9), (0.2, 0.8), (0.3, 0.7)]
+
+
+class CascadeClassifier:
+    """Stage 1 answers outside (low, high); the full model scores the rest."""
+
+    def __init__(self, first, full, low=DEFAULT_LOW, high=DEFAULT_HIGH):
+        if not 0.0 <= low <= high <= 1.0:
+            raise ValueError(f"need 0 <= low <= high <= 1, got ({low}, {high})")
+        self.first = first
+        self.full = full
+        self.low = low
+        self.high = high
+        self.classes_ = np.asarray(getattr(full, "classes_", [0, 1]))
+        self._init_counters()
+
+    def _init_counters(self):
+        self._lock = threading.Lock()
+        self.rows_first = 0
+        self.rows_full = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_counters()
+
+    def uncertain(self, p_first):
+        return (p_first > self.low) & (p_first < self.high)
+
+    def predict_proba(self, X):
+        p = np.asarray(self.first.predict_proba(X))[:, 1].copy()
+        mask = self.uncertain(p)
+        if mask.any():
+            rows = X[mask] if not hasattr(X, "iloc") else X.iloc[np.flatnonzero(mask)]
+            p[mask] = np.asarray(self.full.predict_proba(rows))[:, 1]
+        with self._lock:
+            self.rows_full += int(mask.sum())
+            self.rows_first += int(len(p) - mask.sum())
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return np.where(self.predict_proba(X)[:, 1] >= 0.5, self.classes_[1], self.classes_[0])
+
+    def stats(self):
+        total = self.rows_first + self.rows_full
+        return {"rows_first": self.rows_first, "rows_full": self.rows_full,
+                "first_stage_rate": self.rows_first / total if total else 0.0}
+
+
+def first_stage(X, y, workdir=os.path.join(".cache", "train")):
+    """Fit the zoo's LogisticRegression pipeline, with tuned params if train.py saved them."""
+    from train import _restore_params, make_pipeline, model_zoo
+
+    estimator, _ = model_zoo()["LogisticRegression"]
+    pipe = make_pipeline(estimator)
+    marker = os.path.join(workdir, "stages", "tune__LogisticRegression.json")
+    if os.path.exists(marker):
+        with open(marker) as f:
+            pipe.set_params(**_restore_params(json.load(f)["result"]["best_params"]))
+    return pipe.fit(X, y)
+
+
+def cascade_report(first, full, X, y, bands=REPORT_BANDS, threshold=None):
+    """Hit rates, latency and metric impact of each (low, high) band vs the full model."""
+    from evaluation import evaluate_model
+    from inference import predict_with_proba
+    from latency_profile import benchmark_latency
+
+    keys = ("accuracy", "f1", "roc_auc")
+    full_report = evaluate_model(full, X, y, threshold)
+    full_latency = benchmark_latency(full, X)
+    full_labels, _ = predict_with_proba(full, X, threshold)
+    rows = [{"band": "full", "first_stage_rate": 0.0, "label_agreement": 1.0,
+             **{k: full_report[k] for k in keys},
+             "latency_ms_row_p50": full_latency["latency_ms_row_p50"],
+             "batch_rows_per_second": full_latency["batch_rows_per_second"]}]
+    for low, high in bands:
+        model = CascadeClassifier(first, full, low, high)
+        report = evaluate_model(model, X, y, threshold)
+        hit_rate = model.stats()["first_stage_rate"]
+        labels, _ = predict_with_proba(model, X, threshold)
+        latency = benchmark_latency(model, X)
+        rows.append({"band": f"({low:g}, {high:g})", "first_stage_rate": hit_rate,
+                     "label_agreement": float(np.mean(labels == full_labels)),
+                     **{k: report[k] for k in keys},
+                     **{f"delta_{k}": report[k] - full_report[k] for k in keys},
+                     "latency_ms_row_p50": latency["latency_ms_row_p50"],
+                     "batch_rows_per_second": latency["batch_rows_per_second"],
+                     "row_latency_saving": 1.0 - latency["latency_ms_row_p50"] / full_latency["latency_ms_row_p50"]})
+    return rows
+
+
+def main(argv=None):
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Build a LogisticRegression -> stacking cascade and report its trade-off.")
+    parser.add_argument("--full", default=model_store.DEFAULT_MODEL_PATH, help="full model artifact (default: %(default)s)")
+    parser.add_argument("--train", default=os.path.join(".cache", "train", "train_ds1.csv"),
+                        help="labelled rows for the first stage (default: train.py's training split)")
+    parser.add_argument("--holdout", default=HOLDOUT_PATH, help="labelled rows for the report")
+    parser.add_argument("--low", type=float, default=DEFAULT_LOW)
+    parser.add_argument("--high", type=float, default=DEFAULT_HIGH)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="cascade artifact (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    full = model_store.load_model(args.full)
+    X, y = load_features(args.train)
+    first = first_stage(X, y)
+    model_store.export_artifact(CascadeClassifier(first, full, args.low, args.high), args.output)
+    print(f"Wrote {args.output} (stage 1 answers P(pass) <= {args.low:g} or >= {args.high:g})")
+
+    X_hold, y_hold = load_features(args.holdout)
+    bands = sorted(set(REPORT_BANDS) | {(args.low, args.high)})
+    table = pd.DataFrame(cascade_report(first, full, X_hold, y_hold, bands))
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    # pickle the cascade as cascade.CascadeClassifier, not __main__.CascadeClassifier
+    import cascade as _module
+    _module.main()
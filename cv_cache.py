@@ -0,0 +1,220 @@
+# cv_cache.py
+# Content-addressed store of cross-validation fold scores.
+#
+# Each row is one fold of one candidate, keyed by the estimator classes and
+# parameters, the CV splitter (folds, shuffle, seed), the fold index and the
+# training-data hash (see oof_store.estimator_key). A grid search through
+# cached_grid_search only fits the (candidate, fold) pairs that are not in
+# the store yet, so reruns and widened grids evaluate only new points.
+#
+# The store is a single SQLite file and can be trimmed by age or size.
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from evaluation import CACHE_DIR
+from oof_store import estimator_key
+
+DEFAULT_DB_PATH = os.path.join(CACHE_DIR, "cv_results.sqlite")
+METRICS = ["f1", "accuracy", "precision", "recall", "roc_auc"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fold_scores (
+    key         TEXT PRIMARY KEY,
+    model       TEXT NOT NULL,
+    estimator   TEXT NOT NULL,
+    params      TEXT NOT NULL,
+    data_hash   TEXT NOT NULL,
+    fold_seed   INTEGER,
+    fold        INTEGER NOT NULL,
+    metrics     TEXT NOT NULL,
+    fit_seconds REAL NOT NULL,
+    created_at  REAL NOT NULL,
+    last_used   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fold_scores_model ON fold_scores (model, data_hash);
+CREATE INDEX IF NOT EXISTS fold_scores_last_used ON fold_scores (last_used);
+"""
+
+
+class CVCache:
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self._conn.close()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            rows = self._conn.execute(
+                f"SELECT key, metrics FROM fold_scores WHERE key IN ({','.join('?' * len(part))})", part)
+            found.update((k, json.loads(m)) for k, m in rows)
+        if found:
+            now = time.time()
+            with self._conn:
+                self._conn.executemany("UPDATE fold_scores SET last_used = ? WHERE key = ?",
+                                       [(now, k) for k in found])
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, rows):
+        """rows: dicts with key, model, estimator, params, data_hash, fold_seed, fold, metrics, fit_seconds."""
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO fold_scores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(r["key"], r["model"], r["estimator"], json.dumps(r["params"], sort_keys=True, default=str),
+                  r["data_hash"], r["fold_seed"], r["fold"], json.dumps(r["metrics"]), r["fit_seconds"], now, now)
+                 for r in rows])
+
+    # -------------------------
+    # Eviction
+    # -------------------------
+    def evict(self, max_age_days=None, max_rows=None):
+        """Drop rows unused for `max_age_days`, then the least recently used beyond `max_rows`."""
+        removed = 0
+        with self._conn:
+            if max_age_days is not None:
+                cutoff = time.time() - max_age_days * 86400
+                removed += self._conn.execute("DELETE FROM fold_scores WHERE last_used < ?", (cutoff,)).rowcount
+            if max_rows is not None:
+                removed += self._conn.execute(
+                    "DELETE FROM fold_scores WHERE key IN (SELECT key FROM fold_scores "
+                    "ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (max_rows,)).rowcount
+        self._conn.execute("VACUUM")
+        return removed
+
+    # -------------------------
+    # Reporting
+    # -------------------------
+    def summary(self):
+        """Best candidate (mean CV F1) per model on each model's most recent data.
+
+        Returns a DataFrame shaped like accept1.py's Model Performance Summary,
+        with every metric being the CV mean of that best candidate.
+        """
+        import pandas as pd
+
+        rows = self._conn.execute(
+            "SELECT model, params, data_hash, fold, metrics, last_used FROM fold_scores").fetchall()
+        if not rows:
+            return pd.DataFrame(columns=["Model", "Best_CV_F1", "Accuracy", "Precision", "Recall", "F1", "ROC_AUC", "Folds"])
+        df = pd.DataFrame(rows, columns=["model", "params", "data_hash", "fold", "metrics", "last_used"])
+        latest = df.sort_values("last_used").groupby("model")["data_hash"].last()
+        df = df[df["data_hash"] == df["model"].map(latest)]
+        metrics = pd.DataFrame([json.loads(m) for m in df["metrics"]], index=df.index)
+        df = pd.concat([df[["model", "params"]], metrics], axis=1)
+        means = df.groupby(["model", "params"]).agg(**{m: (m, "mean") for m in METRICS}, Folds=("f1", "size"))
+        best = means.reset_index().sort_values("f1", ascending=False).groupby("model").head(1)
+        out = pd.DataFrame({
+            "Model": best["model"], "Best_CV_F1": best["f1"], "Accuracy": best["accuracy"],
+            "Precision": best["precision"], "Recall": best["recall"], "F1": best["f1"],
+            "ROC_AUC": best["roc_auc"], "Folds": best["Folds"],
+        })
+        return out.sort_values("Model").reset_index(drop=True)
+
+
+# -------------------------
+# Cached grid search
+# -------------------------
+def _fit_and_score(estimator, X, y, train_idx, test_idx):
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+
+    start = time.perf_counter()
+    estimator.fit(X.iloc[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+    X_test, y_test = X.iloc[test_idx], y[test_idx]
+    pred = estimator.predict(X_test)  # same as GridSearchCV's scoring="f1"
+    metrics = {
+        "f1": f1_score(y_test, pred, zero_division=0),
+        "accuracy": accuracy_score(y_test, pred),
+        "precision": precision_score(y_test, pred, zero_division=0),
+        "recall": recall_score(y_test, pred, zero_division=0),
+        "roc_auc": roc_auc_score(y_test, estimator.predict_proba(X_test)[:, 1]),
+    }
+    return {k: float(v) for k, v in metrics.items()}, fit_seconds
+
+
+def cached_grid_search(name, pipeline, grid, X, y, cv, data_hash, cache, n_jobs=-1, refit=True):
+    """GridSearchCV equivalent (scoring="f1") that reads/writes fold scores in `cache`.
+
+    Returns a dict with best_params, best_score, cv_results (one row per
+    candidate), the number of fits computed and reused, and the refitted
+    best estimator.
+    """
+    from joblib import Parallel, delayed
+    from sklearn.base import clone
+    from sklearn.model_selection import ParameterGrid
+
+    y = np.asarray(y)
+    folds = list(cv.split(X, y))
+    candidates = list(ParameterGrid(grid))
+    estimators = [clone(pipeline).set_params(**params) for params in candidates]
+    keys = [[f"{estimator_key(est, data_hash, cv)}:{i}" for i in range(len(folds))] for est in estimators]
+
+    cached = cache.get_many(k for row in keys for k in row)
+    todo = [(c, i) for c in range(len(candidates)) for i in range(len(folds)) if keys[c][i] not in cached]
+    computed = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_and_score)(clone(estimators[c]), X, y, *folds[i]) for c, i in todo)
+
+    new_rows = []
+    for (c, i), (metrics, fit_seconds) in zip(todo, computed):
+        cached[keys[c][i]] = metrics
+        new_rows.append({
+            "key": keys[c][i], "model": name, "estimator": type(pipeline).__name__,
+            "params": candidates[c], "data_hash": data_hash,
+            "fold_seed": getattr(cv, "random_state", None), "fold": i,
+            "metrics": metrics, "fit_seconds": fit_seconds,
+        })
+    cache.put_many(new_rows)
+
+    cv_results = []
+    for c, params in enumerate(candidates):
+        fold_metrics = [cached[k] for k in keys[c]]
+        cv_results.append({"params": params,
+                           **{f"mean_{m}": float(np.mean([f[m] for f in fold_metrics])) for m in METRICS}})
+    best = max(range(len(candidates)), key=lambda c: cv_results[c]["mean_f1"])
+
+    best_estimator = None
+    if refit:
+        best_estimator = clone(estimators[best]).fit(X, y)
+    return {
+        "best_params": candidates[best],
+        "best_score": cv_results[best]["mean_f1"],
+        "cv_results": cv_results,
+        "n_fits_computed": len(todo),
+        "n_fits_reused": len(candidates) * len(folds) - len(todo),
+        "best_estimator": best_estimator,
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or trim the cross-validation result cache.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--max-age-days", type=float, help="drop fold scores unused for this many days")
+    parser.add_argument("--max-rows", type=int, help="keep at most this many fold scores (least recently used go first)")
+    args = parser.parse_args(argv)
+
+    cache = CVCache(args.db)
+    if args.max_age_days is not None or args.max_rows is not None:
+        print(f"Evicted {cache.evict(args.max_age_days, args.max_rows)} fold scores")
+    print(cache.summary().to_string(index=False))
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# dataset.py
+# Typed columnar storage for ds1.csv and engineered_ds1.csv.
+#
+# pandas reads the CSVs as int64/float64 and re-parses the text on every
+# load. Here both datasets are stored as Parquet or Feather with an
+# explicit schema:
+#   * exercise totals/completions             -> uint16
+#   * completion time, attempts, syntax errors (and their sums) -> uint32
+#   * time span -> uint8 (which_time_span_encoded), result -> uint8 (0/1)
+#   * engineered ratios / rates / efficiencies -> float32
+# Values that do not fit the declared type raise instead of wrapping.
+# Readers can project columns, so e.g. scoring reads only RAW_COLUMNS.
+#
+#   python dataset.py convert ds1.csv ds1.parquet
+#   python dataset.py convert engineered_ds1.csv engineered_ds1.feather
+#   python dataset.py report ds1.csv ds1.parquet [--columns ...]
+#
+# float32 features are for storage and analysis; the serving path keeps
+# building float64 features from the raw counters (features.py). Reading a
+# CSV only types the raw counters, so engineered columns stay float64.
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from evaluation import TARGET_COLUMN, encode_target
+from features import COUNTER_COLUMNS, FEATURE_COLUMNS, LEVELS, TIME_SPAN_MAPPING
+
+FORMATS = {".parquet": "parquet", ".pq": "parquet", ".feather": "feather", ".arrow": "feather"}
+
+RAW_SCHEMA = {}
+for _level in LEVELS:
+    RAW_SCHEMA.update({
+        f"total_{_level}_exercise": "uint16",
+        f"completed_{_level}_exercise": "uint16",
+        f"{_level}_exercise_completion_time": "uint32",
+        f"{_level}_exercise_attempt": "uint32",
+        f"{_level}_exercise_syntax_error": "uint32",
+    })
+RAW_SCHEMA["which_time_span_encoded"] = "uint8"
+RAW_SCHEMA[TARGET_COLUMN] = "uint8"
+
+ENGINEERED_SCHEMA = {c: RAW_SCHEMA.get(c, "float32") for c in FEATURE_COLUMNS}
+ENGINEERED_SCHEMA.update({
+    "completed_weighted_score": "uint32", "attempts_weighted_score": "uint32",
+    "syntax_error_weighted_score": "uint32", "total_completed_all": "uint32",
+    "total_attempt_all": "uint32", "total_error_all": "uint32",
+    TARGET_COLUMN: "uint8",
+})
+
+
+def storage_format(path):
+    if os.path.isdir(path):
+        return "parquet"  # partitioned dataset, e.g. written by extract.py
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"unsupported dataset file {path!r}; use one of {sorted(FORMATS)}")
+    return fmt
+
+
+def schema_for(df):
+    """Engineered schema when every model column is present, raw schema otherwise."""
+    return ENGINEERED_SCHEMA if all(c in df.columns for c in FEATURE_COLUMNS) else RAW_SCHEMA
+
+
+def _downcast_id(ids):
+    if not pd.api.types.is_integer_dtype(ids) or (len(ids) and ids.min() < 0):
+        return ids.astype("string")
+    for dtype in ("uint16", "uint32", "uint64"):
+        if not len(ids) or ids.max() <= np.iinfo(dtype).max:
+            return ids.astype(dtype)
+
+
+def to_typed(df, schema=None):
+    """Cast df to `schema` (default: schema_for(df)), refusing lossy casts."""
+    schema = schema or schema_for(df)
+    df = df.copy()
+    if "which_time_span_encoded" in schema and "which_time_span_encoded" not in df.columns \
+            and "which_time_span" in df.columns:
+        span = df.pop("which_time_span")
+        if not pd.api.types.is_numeric_dtype(span):
+            span = span.astype(str).str.strip().str.title().map(TIME_SPAN_MAPPING)
+        df["which_time_span_encoded"] = span
+    if TARGET_COLUMN in df.columns and TARGET_COLUMN in schema:
+        df[TARGET_COLUMN] = encode_target(df[TARGET_COLUMN])
+    if "student_id" in df.columns:
+        df["student_id"] = _downcast_id(df["student_id"])
+
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+        values = df[column]
+        if values.isna().any():
+            raise ValueError(f"column {column!r} has missing values; cannot store as {dtype}")
+        if dtype.startswith("uint"):
+            info = np.iinfo(dtype)
+            lo, hi = values.min(), values.max()
+            if lo < 0 or hi > info.max:
+                raise ValueError(f"column {column!r} spans [{lo}, {hi}], outside {dtype}")
+            if not np.array_equal(values, np.round(values)):
+                raise ValueError(f"column {column!r} has non-integer values; cannot store as {dtype}")
+        df[column] = values.astype(dtype)
+    return df
+
+
+def save_dataset(df, path, schema=None):
+    """Store df with the typed schema as Parquet or Feather (by extension); returns path."""
+    typed = to_typed(df, schema).reset_index(drop=True)
+    tmp = f"{path}.tmp"
+    if storage_format(path) == "parquet":
+        typed.to_parquet(tmp, index=False)
+    else:
+        typed.to_feather(tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def load_dataset(path, columns=None):
+    """Load a stored dataset (or a CSV, raw counters typed on read), projecting `columns` if given.
+
+    CSV counters go through to_typed, so out-of-range, missing or fractional
+    values raise instead of wrapping (read_csv's dtype= would wrap them).
+    """
+    if path.lower().endswith(".csv"):
+        df = pd.read_csv(path, usecols=columns)
+        return to_typed(df, {c: t for c, t in RAW_SCHEMA.items() if c != TARGET_COLUMN})
+    if storage_format(path) == "parquet":
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_feather(path, columns=columns)
+
+
+def arrow_schema(columns, schema=RAW_SCHEMA):
+    """pyarrow schema for `columns`: typed ones from `schema`, the rest as strings."""
+    import pyarrow as pa
+
+    return pa.schema([(c, pa.from_numpy_dtype(np.dtype(schema[c])) if c in schema else pa.string())
+                      for c in columns])
+
+
+def convert(csv_path, out_path):
+    return save_dataset(pd.read_csv(csv_path), out_path)
+
+
+# -------------------------
+# Load time / memory report
+# -------------------------
+def _measure(load, repeat):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = load()
+        seconds.append(time.perf_counter() - start)
+    return {"seconds": min(seconds), "memory_mb": df.memory_usage(deep=True).sum() / 2**20,
+            "rows": len(df), "columns": df.shape[1]}
+
+
+def compare_with_csv(csv_path, typed_path, columns=None, repeat=3):
+    """Load time and in-memory size: plain pd.read_csv vs the typed file, all columns and projected."""
+    report = {
+        "csv": _measure(lambda: pd.read_csv(csv_path), repeat),
+        "typed": _measure(lambda: load_dataset(typed_path), repeat),
+        "file_mb": {"csv": os.path.getsize(csv_path) / 2**20, "typed": os.path.getsize(typed_path) / 2**20},
+    }
+    if columns:
+        report["csv_projected"] = _measure(lambda: pd.read_csv(csv_path, usecols=columns), repeat)
+        report["typed_projected"] = _measure(lambda: load_dataset(typed_path, columns), repeat)
+    report["speedup"] = report["csv"]["seconds"] / report["typed"]["seconds"]
+    report["memory_ratio"] = report["typed"]["memory_mb"] / report["csv"]["memory_mb"]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Typed Parquet/Feather storage for ds1.csv and engineered_ds1.csv.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_convert = sub.add_parser("convert", help="store a CSV with the typed schema")
+    p_convert.add_argument("csv")
+    p_convert.add_argument("target", help=".parquet or .feather")
+    p_report = sub.add_parser("report", help="compare load time and memory against the CSV")
+    p_report.add_argument("csv")
+    p_report.add_argument("typed")
+    p_report.add_argument("--columns", nargs="+", default=COUNTER_COLUMNS[:5],
+                          help="columns for the projected load (default: the easy-level counters)")
+    p_report.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        convert(args.csv, args.target)
+        print(f"Wrote {args.target} ({os.path.getsize(args.target) / 2**20:.2f} MB, "
+              f"CSV {os.path.getsize(args.csv) / 2**20:.2f} MB)")
+    else:
+        print(json.dumps(compare_with_csv(args.csv, args.typed, args.columns, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
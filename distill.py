@@ -0,0 +1,135 @@
+# distill.py
+# Distilled fast tier: one compact gradient-boosted model trained to mimic
+# the stacking ensemble's success probabilities.
+#
+# The student is a HistGradientBoostingRegressor fitted on the teacher's
+# P(pass) over the engineered training rows. DistilledClassifier exposes
+# classes_ / predict_proba / predict like the stacking model, so the
+# artifact loads through model_store and scores through inference,
+# batch_scoring, score_cohort.py and serve.py unchanged:
+#
+#   python distill.py --teacher stacking_model.pkl --output distilled_model.pkl
+#   python score_cohort.py cohort.csv scores.csv --model distilled_model.pkl
+#
+# The fidelity report compares student and teacher on the held-out set:
+# label agreement, probability MAE, F1/ROC AUC deltas, latency and size.
+import argparse
+import json
+import os
+
+import numpy as np
+
+import model_store
+from evaluation import HOLDOUT_PATH, TARGET_COLUMN, encode_target
+from features import build_feature_frame, raw_matrix
+
+DEFAULT_OUTPUT = "distilled_model.pkl"
+DEFAULT_TRANSFER = os.path.join(".cache", "train", "train_ds1.csv")
+STUDENT_PARAMS = {"max_iter": 300, "max_depth": 4, "learning_rate": 0.1, "min_samples_leaf": 20,
+                  "early_stopping": True, "validation_fraction": 0.1, "random_state": 42}
+
+
+class DistilledClassifier:
+    """Classifier facade over a regressor of the teacher's P(pass)."""
+
+    def __init__(self, classes, params=None):
+        self.classes_ = np.asarray(classes)
+        self.params = dict(STUDENT_PARAMS, **(params or {}))
+
+    def fit(self, X, teacher_proba):
+        from sklearn.ensemble import HistGradientBoostingRegressor
+
+        self.regressor_ = HistGradientBoostingRegressor(**self.params).fit(X, teacher_proba)
+        return self
+
+    def predict_proba(self, X):
+        p = np.clip(self.regressor_.predict(X), 0.0, 1.0)
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return np.where(self.predict_proba(X)[:, 1] >= 0.5, self.classes_[1], self.classes_[0])
+
+
+def load_features(path):
+    """Engineered features (and labels, if present) of a ds1.csv- or engineered_ds1.csv-shaped file.
+
+    CSV, Parquet and Feather files are accepted (see dataset.py). Features
+    are always rebuilt in float64 from the raw counters, as on the serving
+    path, never taken from stored (possibly float32) engineered columns.
+    """
+    from dataset import load_dataset
+
+    df = load_dataset(path)
+    X = build_feature_frame(raw_matrix(df))
+    y = encode_target(df[TARGET_COLUMN]) if TARGET_COLUMN in df.columns else None
+    return X, y
+
+
+def distill(teacher, X_transfer, params=None):
+    proba = np.asarray(teacher.predict_proba(X_transfer))[:, 1]
+    return DistilledClassifier(getattr(teacher, "classes_", [0, 1]), params).fit(X_transfer, proba)
+
+
+def fidelity_report(teacher, student, X, y, threshold=None):
+    """Student vs teacher on (X, y): agreement, probability error and metric deltas."""
+    from evaluation import evaluate_model
+    from inference import predict_with_proba
+    from latency_profile import benchmark_latency
+
+    t_labels, t_proba = predict_with_proba(teacher, X, threshold)
+    s_labels, s_proba = predict_with_proba(student, X, threshold)
+    err = np.abs(s_proba - t_proba)
+    t_report = evaluate_model(teacher, X, y, threshold)
+    s_report = evaluate_model(student, X, y, threshold)
+    t_latency = benchmark_latency(teacher, X)
+    s_latency = benchmark_latency(student, X)
+    keys = ("accuracy", "f1", "roc_auc")
+    return {
+        "n_rows": int(len(X)),
+        "label_agreement": float(np.mean(t_labels == s_labels)),
+        "proba_mae": float(err.mean()),
+        "proba_max_abs_error": float(err.max()),
+        "teacher": {k: t_report[k] for k in keys},
+        "student": {k: s_report[k] for k in keys},
+        "delta": {k: s_report[k] - t_report[k] for k in keys},
+        "latency_ms_row_p50": {"teacher": t_latency["latency_ms_row_p50"], "student": s_latency["latency_ms_row_p50"]},
+        "batch_rows_per_second": {"teacher": t_latency["batch_rows_per_second"],
+                                  "student": s_latency["batch_rows_per_second"]},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distill the stacking model into a single compact GBM.")
+    parser.add_argument("--teacher", default=model_store.DEFAULT_MODEL_PATH, help="teacher artifact (default: %(default)s)")
+    parser.add_argument("--transfer", default=DEFAULT_TRANSFER,
+                        help="rows to distill on, raw or engineered (default: train.py's training split). "
+                             "engineered_ds1.csv also contains the held-out rows, which makes the report optimistic.")
+    parser.add_argument("--holdout", default=HOLDOUT_PATH, help="labelled rows for the fidelity report")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="student artifact (default: %(default)s)")
+    parser.add_argument("--report", default=None, help="write the fidelity report as JSON here")
+    args = parser.parse_args(argv)
+
+    teacher = model_store.load_model(args.teacher)
+    X_transfer, _ = load_features(args.transfer)
+    student = distill(teacher, X_transfer)
+    model_store.export_artifact(student, args.output)
+    print(f"Distilled {len(X_transfer):,} rows into {args.output} "
+          f"({os.path.getsize(args.output) / 2**20:.2f} MB vs {os.path.getsize(args.teacher) / 2**20:.2f} MB)")
+
+    X_hold, y_hold = load_features(args.holdout)
+    if y_hold is None:
+        print(f"No `{TARGET_COLUMN}` column in {args.holdout}; skipping the fidelity report.")
+        return
+    report = fidelity_report(teacher, student, X_hold, y_hold)
+    report["size_mb"] = {"teacher": os.path.getsize(args.teacher) / 2**20, "student": os.path.getsize(args.output) / 2**20}
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    # run through the importable module so the pickled student references
+    # distill.DistilledClassifier rather than __main__.DistilledClassifier
+    import distill as _module
+    _module.main()
@@ -0,0 +1,179 @@
+# evaluation.py
+# Evaluation report engine: scores a held-out set in one batched pass and
+# derives the confusion matrix, ROC/PR curves and classification report
+# from that single probability vector. Curves use one sort plus cumulative
+# sums (the same construction as sklearn.metrics.roc_curve), not a loop
+# over thresholds.
+#
+# Reports are cached on disk as JSON, keyed by the model file hash, the
+# held-out file hash and the threshold, so dashboards show live numbers
+# instantly after the first computation.
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+import model_store
+
+HOLDOUT_PATH = os.environ.get("HOLDOUT_PATH", "holdout_ds1.csv")
+CACHE_DIR = os.environ.get("MLINCS_CACHE_DIR", ".cache")
+TARGET_COLUMN = "result"
+REPORT_VERSION = 1
+
+_lock = threading.Lock()
+_memo = {}         # cache key -> report (avoids re-reading JSON on every rerun)
+_file_hashes = {}  # abs path -> ((mtime_ns, size), sha256)
+
+
+# -------------------------
+# Helpers
+# -------------------------
+def encode_target(y):
+    """Map the `result` column to 0/1 (accepts 0/1 or pass/fail labels)."""
+    import pandas as pd
+
+    # pandas 3 reads text columns as the `str` dtype, not object
+    if not pd.api.types.is_numeric_dtype(y):
+        mapped = y.astype(str).str.strip().str.lower().map({"pass": 1, "fail": 0, "1": 1, "0": 0})
+        if mapped.isna().any():
+            raise ValueError("unrecognised values in the result column; expected pass/fail or 1/0")
+        return mapped.to_numpy(dtype=np.int64)
+    return y.to_numpy(dtype=np.int64)
+
+
+def dataset_file_hash(path):
+    """SHA-256 of a dataset file, recomputed only when its mtime/size changes."""
+    key = os.path.abspath(path)
+    stat = os.stat(key)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    hit = _file_hashes.get(key)
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    digest = model_store.file_hash(key)
+    _file_hashes[key] = (stamp, digest)
+    return digest
+
+
+def binary_curves(y_true, score):
+    """ROC and precision-recall curves from one descending sort + cumsum."""
+    order = np.argsort(-score, kind="mergesort")
+    y_sorted = y_true[order]
+    s_sorted = score[order]
+
+    # last index of every run of equal scores = one threshold each
+    distinct = np.flatnonzero(np.diff(s_sorted))
+    idx = np.r_[distinct, len(s_sorted) - 1]
+    tps = np.cumsum(y_sorted)[idx].astype(np.float64)
+    fps = (idx + 1) - tps
+    thresholds = s_sorted[idx]
+
+    pos, neg = tps[-1], fps[-1]
+    tpr = np.r_[0.0, tps / pos] if pos else np.zeros(len(tps) + 1)
+    fpr = np.r_[0.0, fps / neg] if neg else np.zeros(len(fps) + 1)
+    roc_auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2.0))
+
+    precision = tps / (tps + fps)
+    recall = tps / pos if pos else np.zeros_like(tps)
+    average_precision = float(np.sum(np.diff(np.r_[0.0, recall]) * precision))
+
+    return {
+        "roc": {"fpr": fpr.tolist(), "tpr": tpr.tolist(), "thresholds": np.r_[np.inf, thresholds].tolist()},
+        "pr": {"precision": np.r_[1.0, precision].tolist(), "recall": np.r_[0.0, recall].tolist()},
+        "roc_auc": roc_auc,
+        "average_precision": average_precision,
+    }
+
+
+def classification_summary(y_true, y_pred):
+    """Confusion matrix and sklearn-style classification report for 0/1 labels."""
+    cm = np.bincount(2 * y_true + y_pred, minlength=4).reshape(2, 2)  # rows: true, cols: predicted
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    tp = np.diag(cm).astype(np.float64)
+    precision = np.divide(tp, predicted, out=np.zeros(2), where=predicted != 0)
+    recall = np.divide(tp, support, out=np.zeros(2), where=support != 0)
+    f1 = np.divide(2 * precision * recall, precision + recall, out=np.zeros(2), where=(precision + recall) != 0)
+    total = support.sum()
+    weights = support / total if total else np.zeros(2)
+
+    report = {
+        str(c): {"precision": float(precision[c]), "recall": float(recall[c]),
+                 "f1-score": float(f1[c]), "support": int(support[c])}
+        for c in (0, 1)
+    }
+    report["accuracy"] = float(tp.sum() / total) if total else 0.0
+    report["macro avg"] = {"precision": float(precision.mean()), "recall": float(recall.mean()),
+                           "f1-score": float(f1.mean()), "support": int(total)}
+    report["weighted avg"] = {"precision": float(precision @ weights), "recall": float(recall @ weights),
+                              "f1-score": float(f1 @ weights), "support": int(total)}
+    return cm, report
+
+
+# -------------------------
+# Engine
+# -------------------------
+def evaluate_model(model, X, y_true, threshold=None):
+    """Full report for one batched scoring pass of `model` over X."""
+    from inference import DEFAULT_THRESHOLD, predict_with_proba
+
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLD
+    _, proba = predict_with_proba(model, X, threshold)
+    if proba is None:
+        raise ValueError("model does not expose predict_proba; curves cannot be computed")
+    y_true = np.asarray(y_true, dtype=np.int64)
+    y_pred = (proba >= threshold).astype(np.int64)
+
+    cm, report = classification_summary(y_true, y_pred)
+    curves = binary_curves(y_true, proba)
+    return {
+        "threshold": float(threshold),
+        "n_rows": int(len(y_true)),
+        "accuracy": report["accuracy"],
+        "precision": report["1"]["precision"],
+        "recall": report["1"]["recall"],
+        "f1": report["1"]["f1-score"],
+        "roc_auc": curves["roc_auc"],
+        "average_precision": curves["average_precision"],
+        "confusion_matrix": cm.tolist(),
+        "classification_report": report,
+        "roc": curves["roc"],
+        "pr": curves["pr"],
+    }
+
+
+def evaluate(model_path=model_store.DEFAULT_MODEL_PATH, holdout_path=HOLDOUT_PATH, threshold=None, cache_dir=CACHE_DIR):
+    """Cached evaluation of the model at `model_path` on a ds1.csv-shaped held-out file."""
+    from inference import DEFAULT_THRESHOLD
+
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLD
+    model_digest = model_store.model_hash(model_path)
+    data_digest = dataset_file_hash(holdout_path)
+    key = hashlib.sha256(f"{REPORT_VERSION}:{model_digest}:{data_digest}:{threshold!r}".encode()).hexdigest()
+
+    with _lock:
+        if key in _memo:
+            return _memo[key]
+    cache_path = os.path.join(cache_dir, "evaluation", f"{key}.json")
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            report = json.load(f)
+    else:
+        import pandas as pd
+        from features import build_feature_frame, raw_matrix
+
+        df = pd.read_csv(holdout_path)
+        report = evaluate_model(model_store.load_model(model_path), build_feature_frame(raw_matrix(df)),
+                                encode_target(df[TARGET_COLUMN]), threshold)
+        report.update({"model_sha256": model_digest, "dataset_sha256": data_digest})
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp = f"{cache_path}.tmp-{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(report, f)
+        os.replace(tmp, cache_path)
+    with _lock:
+        _memo[key] = report
+    return report
@@ -0,0 +1,59 @@
+# evaluation_view.py
+# Streamlit rendering of an evaluation.evaluate() report, shared by the
+# dashboard tabs in hgs1.py and accept1.py.
+import os
+
+import pandas as pd
+import streamlit as st
+
+import evaluation
+
+
+def render_report(report):
+    c1, c2, c3, c4, c5 = st.columns(5)
+    c1.metric("Accuracy", f"{report['accuracy']:.3f}")
+    c2.metric("Precision", f"{report['precision']:.3f}")
+    c3.metric("Recall", f"{report['recall']:.3f}")
+    c4.metric("F1 Score", f"{report['f1']:.3f}")
+    c5.metric("ROC AUC", f"{report['roc_auc']:.3f}")
+    st.caption(f"{report['n_rows']:,} held-out rows, threshold {report['threshold']:.2f}, "
+               f"model {report['model_sha256'][:12]}, data {report['dataset_sha256'][:12]}")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Confusion Matrix")
+        cm = pd.DataFrame(report["confusion_matrix"], index=["Actual 0 (Fail)", "Actual 1 (Pass)"],
+                          columns=["Predicted 0 (Fail)", "Predicted 1 (Pass)"])
+        st.dataframe(cm, use_container_width=True)
+    with col2:
+        st.subheader("Classification Report")
+        cr = report["classification_report"]
+        rows = {k: v for k, v in cr.items() if isinstance(v, dict)}
+        table = pd.DataFrame(rows).T[["precision", "recall", "f1-score", "support"]]
+        st.dataframe(table.style.format({"precision": "{:.2f}", "recall": "{:.2f}", "f1-score": "{:.2f}", "support": "{:.0f}"}),
+                     use_container_width=True)
+        st.caption(f"Accuracy: {cr['accuracy']:.2f}")
+
+    col3, col4 = st.columns(2)
+    with col3:
+        st.subheader(f"ROC Curve (AUC = {report['roc_auc']:.3f})")
+        st.line_chart(pd.DataFrame({"TPR": report["roc"]["tpr"]}, index=pd.Index(report["roc"]["fpr"], name="FPR")))
+    with col4:
+        st.subheader(f"Precision–Recall Curve (AP = {report['average_precision']:.3f})")
+        st.line_chart(pd.DataFrame({"Precision": report["pr"]["precision"]},
+                                   index=pd.Index(report["pr"]["recall"], name="Recall")))
+
+
+def render_live_evaluation(model_path, holdout_path=evaluation.HOLDOUT_PATH, threshold=None):
+    """Evaluate (cached) and render, or explain what is missing."""
+    if not os.path.exists(holdout_path):
+        st.info(f"No held-out set found at `{holdout_path}`. Place a ds1.csv-shaped file with a `result` column there "
+                "(or set HOLDOUT_PATH) to see live metrics for the loaded model.")
+        return
+    try:
+        with st.spinner("Scoring held-out set..."):
+            report = evaluation.evaluate(model_path, holdout_path, threshold)
+    except Exception as e:
+        st.error(f"Evaluation failed: {e}")
+        return
+    render_report(report)
@@ -0,0 +1,299 @@
+# event_aggregator.py
+# Incremental per-student, per-time-span IDE counters.
+#
+# ds1.csv is a full snapshot of the 15 counters per student and time span.
+# EventAggregator keeps the same counters up to date from raw submission
+# events instead, in a compact SQLite store, so fresh model rows cost
+# O(new events) rather than a recompute over all history.
+#
+# An event is a mapping with:
+#   student_id     any hashable id (stored as text)
+#   time_span      Early/Mid/End or 1/2/3
+#   level          easy/medium/hard
+#   exercise_id    id of the exercise within the course
+#   kind           "submission" (default) or "assigned"
+#   syntax_errors  syntax errors reported for this submission (default 0)
+#   completed      True when this submission solves the exercise
+#   completion_time  time taken to solve it, counted on the first completion
+#
+# Counter semantics per (student, span, level):
+#   total_*       distinct exercises assigned or submitted to
+#   completed_*   distinct exercises completed
+#   *_completion_time  sum of completion_time over first completions
+#   *_attempt     number of submissions
+#   *_syntax_error  sum of syntax_errors over submissions
+#
+#   python event_aggregator.py --check   # incremental == full recompute
+import os
+import sqlite3
+import time
+
+from evaluation import CACHE_DIR
+from features import COUNTER_COLUMNS, LEVELS, RAW_COLUMNS, TIME_SPAN_MAPPING
+
+DEFAULT_DB_PATH = os.path.join(CACHE_DIR, "student_counters.sqlite")
+KINDS = ["submission", "assigned"]
+_CODES = set(TIME_SPAN_MAPPING.values())
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS exercise_state (
+    student_id  TEXT NOT NULL,
+    span        INTEGER NOT NULL,
+    level       INTEGER NOT NULL,
+    exercise_id TEXT NOT NULL,
+    completed   INTEGER NOT NULL,
+    PRIMARY KEY (student_id, span, level, exercise_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS counters (
+    student_id  TEXT NOT NULL,
+    span        INTEGER NOT NULL,
+    {", ".join(f"{c} INTEGER NOT NULL DEFAULT 0" for c in COUNTER_COLUMNS)},
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (student_id, span)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS counters_updated_at ON counters (updated_at);
+"""
+
+
+def _span_code(value):
+    code = TIME_SPAN_MAPPING.get(str(value).strip().title())
+    if code is None:
+        try:
+            code = int(value)
+        except (TypeError, ValueError):
+            code = None
+    if code not in _CODES:
+        raise ValueError(f"unknown time span {value!r}; expected Early/Mid/End or 1/2/3")
+    return code
+
+
+def _level_index(value):
+    level = str(value).strip().lower()
+    if level not in LEVELS:
+        raise ValueError(f"unknown level {value!r}; expected one of {LEVELS}")
+    return LEVELS.index(level)
+
+
+def _flag(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y")
+    return bool(value)
+
+
+def _normalize(event):
+    """Event mapping -> (student, span, level, exercise, kind, syntax_errors, completed, completion_time)."""
+    kind = event.get("kind") or "submission"
+    if kind not in KINDS:
+        raise ValueError(f"unknown event kind {kind!r}; expected one of {KINDS}")
+    return (str(event["student_id"]), _span_code(event["time_span"]), _level_index(event["level"]),
+            str(event["exercise_id"]), kind, int(event.get("syntax_errors") or 0),
+            _flag(event.get("completed", False)), int(round(float(event.get("completion_time") or 0))))
+
+
+def _zero():
+    return [0] * len(COUNTER_COLUMNS)
+
+
+def apply_events(normalized, state, counters):
+    """Fold normalized events into `state` ({exercise key: completed}) and `counters` ({(student, span): [15]}).
+
+    Returns the changed exercise keys. Shared by the SQLite store and the
+    in-memory full recompute, so both follow exactly the same rules.
+    """
+    touched = set()
+    for student, span, level, exercise, kind, errors, completed, ctime in normalized:
+        key = (student, span, level, exercise)
+        row = counters.setdefault((student, span), _zero())
+        base = 5 * level
+        if key not in state:
+            state[key] = False
+            row[base] += 1                 # total
+            touched.add(key)
+        if kind == "assigned":
+            continue
+        row[base + 3] += 1                 # attempt
+        row[base + 4] += errors            # syntax errors
+        if completed and not state[key]:
+            state[key] = True
+            row[base + 1] += 1             # completed
+            row[base + 2] += ctime         # completion time
+            touched.add(key)
+    return touched
+
+
+def recompute(events):
+    """Full recompute from all events: {(student, span): [15 counters]} (reference for --check)."""
+    counters = {}
+    apply_events(map(_normalize, events), {}, counters)
+    return counters
+
+
+class EventAggregator:
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+        self.events_applied = 0
+
+    def close(self):
+        self._conn.close()
+
+    def add(self, event):
+        self.add_many([event])
+
+    def add_many(self, events, batch_size=10000):
+        """Apply events in batches: one read of the touched exercise states and one upsert per batch."""
+        batch = []
+        for event in events:
+            batch.append(event)
+            if len(batch) >= batch_size:
+                self._apply_batch(batch)
+                batch = []
+        if batch:
+            self._apply_batch(batch)
+
+    def _apply_batch(self, events):
+        normalized = [_normalize(e) for e in events]
+        keys = {(s, sp, lv, ex) for s, sp, lv, ex, *_ in normalized}
+        state = self._load_state(keys)
+        known = dict(state)
+        deltas = {}
+        touched = apply_events(normalized, state, deltas)
+
+        now = time.time()
+        cols = ", ".join(COUNTER_COLUMNS)
+        updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in COUNTER_COLUMNS)
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO exercise_state VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (student_id, span, level, exercise_id) DO UPDATE SET completed = excluded.completed",
+                [(*k, int(state[k])) for k in touched if known.get(k) != state[k]])
+            self._conn.executemany(
+                f"INSERT INTO counters (student_id, span, {cols}, updated_at) "
+                f"VALUES (?, ?, {', '.join('?' * len(COUNTER_COLUMNS))}, ?) "
+                f"ON CONFLICT (student_id, span) DO UPDATE SET {updates}, updated_at = excluded.updated_at",
+                [(s, sp, *row, now) for (s, sp), row in deltas.items()])
+        self.events_applied += len(normalized)
+
+    def _load_state(self, keys):
+        """Stored completion flags of exactly `keys`: primary-key lookups, O(batch) not O(history)."""
+        state = {}
+        keys = sorted(keys)
+        for i in range(0, len(keys), 200):  # 4 parameters per key, under SQLite's 999 limit
+            part = keys[i:i + 200]
+            # CROSS JOIN keeps the batch as the outer loop: one primary-key search per key
+            rows = self._conn.execute(
+                "WITH batch (student_id, span, level, exercise_id) AS "
+                f"(VALUES {', '.join(['(?, ?, ?, ?)'] * len(part))}) "
+                "SELECT e.student_id, e.span, e.level, e.exercise_id, e.completed "
+                "FROM batch CROSS JOIN exercise_state e USING (student_id, span, level, exercise_id)",
+                [v for key in part for v in key])
+            state.update(((s, sp, lv, ex), bool(done)) for s, sp, lv, ex, done in rows)
+        return state
+
+    # -------------------------
+    # Model-ready rows
+    # -------------------------
+    def rows(self, student_ids=None, updated_since=None):
+        """[(student_id, [16 raw values in RAW_COLUMNS order])], optionally filtered."""
+        sql = f"SELECT student_id, span, {', '.join(COUNTER_COLUMNS)} FROM counters"
+        where, params = [], []
+        if updated_since is not None:
+            where.append("updated_at >= ?")
+            params.append(updated_since)
+        if student_ids is not None:
+            ids = [str(s) for s in student_ids]
+            where.append(f"student_id IN ({','.join('?' * len(ids))})")
+            params.extend(ids)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY student_id, span"
+        return [(r[0], [*r[2:], r[1]]) for r in self._conn.execute(sql, params)]
+
+    def frame(self, student_ids=None, updated_since=None):
+        """ds1.csv-shaped DataFrame (student_id + RAW_COLUMNS), ready for features.raw_matrix."""
+        import pandas as pd
+
+        rows = self.rows(student_ids, updated_since)
+        return pd.DataFrame([[sid, *raw] for sid, raw in rows], columns=["student_id"] + RAW_COLUMNS)
+
+    def counters(self):
+        """{(student_id, span): [15 counters]} for the whole store."""
+        return {(sid, raw[-1]): raw[:-1] for sid, raw in self.rows()}
+
+
+# -------------------------
+# Consistency check
+# -------------------------
+def _random_events(n, seed):
+    import random
+
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield {
+            "student_id": f"s{rng.randrange(200)}",
+            "time_span": rng.choice(["Early", "Mid", "End", 1, 2, 3]),
+            "level": rng.choice(LEVELS),
+            "exercise_id": f"ex{rng.randrange(30)}",
+            "kind": "assigned" if rng.random() < 0.1 else "submission",
+            "syntax_errors": rng.randrange(4),
+            "completed": rng.random() < 0.3,
+            "completion_time": rng.randrange(1, 900),
+        }
+
+
+def check_incremental(n_events=50000, batch_size=777, seed=0):
+    """Feed random events in uneven batches and compare with a full recompute."""
+    import tempfile
+
+    events = list(_random_events(n_events, seed))
+    with tempfile.TemporaryDirectory() as tmp:
+        agg = EventAggregator(os.path.join(tmp, "counters.sqlite"))
+        start = time.perf_counter()
+        for i in range(0, len(events), batch_size):
+            agg.add_many(events[i:i + batch_size])
+        seconds = time.perf_counter() - start
+        got = agg.counters()
+        agg.close()
+    expected = recompute(events)
+    if got != expected:
+        bad = sorted(k for k in expected.keys() | got.keys() if got.get(k) != expected.get(k))
+        raise AssertionError(f"{len(bad)} (student, span) rows differ, e.g. {bad[0]}: "
+                             f"{got.get(bad[0])} != {expected.get(bad[0])}")
+    return {"events": n_events, "rows": len(got), "seconds": seconds, "events_per_second": n_events / seconds}
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Incremental IDE counter store.")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--check", action="store_true", help="verify incremental updates against a full recompute")
+    parser.add_argument("--ingest", metavar="EVENTS_CSV", help="apply the events in this CSV (one event per row)")
+    parser.add_argument("--export", metavar="CSV", help="write model-ready rows (student_id + 16 raw columns)")
+    args = parser.parse_args(argv)
+    if not (args.check or args.ingest or args.export):
+        parser.error("nothing to do; give --check, --ingest or --export")
+
+    if args.check:
+        print(json.dumps(check_incremental(), indent=2))
+    if not (args.ingest or args.export):
+        return
+    agg = EventAggregator(args.db)
+    try:
+        if args.ingest:
+            import csv
+
+            with open(args.ingest, newline="") as f:
+                agg.add_many(csv.DictReader(f))
+            print(f"Applied {agg.events_applied:,} events to {args.db}")
+        if args.export:
+            agg.frame().to_csv(args.export, index=False)
+    finally:
+        agg.close()
+
+
+if __name__ == "__main__":
+    main()
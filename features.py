@@ -0,0 +1,136 @@
+# features.py
+# Single source of truth for the 32-column model input.
+#
+# The raw input is 16 values per student: the 15 IDE counters (total,
+# completed, completion time, attempts and syntax errors for the easy,
+# medium and hard levels) plus the encoded time span. Derived features
+# follow the training formulas from code1.py / code0.py (Step 3 in
+# accept1.py): efficiencies and error rates divide by (x + 1), completion
+# ratios are 0 when no exercise of that level was assigned.
+import numpy as np
+import pandas as pd
+
+LEVELS = ["easy", "medium", "hard"]
+LEVEL_WEIGHTS = np.array([1.0, 2.0, 3.0])
+
+COUNTER_COLUMNS = []
+for _level in LEVELS:
+    COUNTER_COLUMNS += [
+        f"total_{_level}_exercise",
+        f"completed_{_level}_exercise",
+        f"{_level}_exercise_completion_time",
+        f"{_level}_exercise_attempt",
+        f"{_level}_exercise_syntax_error",
+    ]
+
+RAW_COLUMNS = COUNTER_COLUMNS + ["which_time_span_encoded"]
+
+FEATURE_COLUMNS = COUNTER_COLUMNS + [
+    "easy_completion_ratio", "medium_completion_ratio", "hard_completion_ratio",
+    "easy_effort_efficiency", "medium_effort_efficiency", "hard_effort_efficiency",
+    "easy_error_rate", "medium_error_rate", "hard_error_rate",
+    "completed_weighted_score", "attempts_weighted_score", "syntax_error_weighted_score",
+    "which_time_span_encoded",
+    "total_completed_all", "total_attempt_all", "total_error_all",
+    "overall_efficiency",
+]
+
+TIME_SPAN_MAPPING = {"Early": 1, "Mid": 2, "End": 3}
+
+
+# -------------------------
+# Vectorized builder
+# -------------------------
+def build_features(raw):
+    """Turn an (N, 16) raw array into the (N, 32) model matrix (float64)."""
+    raw = np.asarray(raw, dtype=np.float64)
+    if raw.ndim == 1:
+        raw = raw[np.newaxis, :]
+    if raw.ndim != 2 or raw.shape[1] != len(RAW_COLUMNS):
+        raise ValueError(f"expected an (N, {len(RAW_COLUMNS)}) array of raw inputs, got shape {raw.shape}")
+
+    # (N, level, counter) -> one (N, 3) array per counter kind
+    total, completed, ctime, attempt, error = raw[:, :15].reshape(-1, 3, 5).transpose(2, 0, 1)
+
+    out = np.empty((raw.shape[0], len(FEATURE_COLUMNS)), dtype=np.float64)
+    out[:, :15] = raw[:, :15]
+    np.divide(completed, total, out=out[:, 15:18], where=total != 0)
+    out[:, 15:18][total == 0] = 0.0
+    out[:, 18:21] = ctime / (completed + 1)
+    out[:, 21:24] = error / (attempt + 1)
+    out[:, 24] = completed @ LEVEL_WEIGHTS
+    out[:, 25] = attempt @ LEVEL_WEIGHTS
+    out[:, 26] = error @ LEVEL_WEIGHTS
+    out[:, 27] = raw[:, 15]
+    out[:, 28] = completed.sum(axis=1)
+    out[:, 29] = attempt.sum(axis=1)
+    out[:, 30] = error.sum(axis=1)
+    out[:, 31] = out[:, 28] / (out[:, 29] + 1)
+    return out
+
+
+def build_feature_frame(raw, index=None):
+    """Same as build_features but returns a DataFrame with the training column names."""
+    return pd.DataFrame(build_features(raw), columns=FEATURE_COLUMNS, index=index)
+
+
+def raw_matrix(df):
+    """Extract the (N, 16) raw array from a ds1.csv-shaped DataFrame.
+
+    Accepts either `which_time_span_encoded` or the original `which_time_span`
+    column (Early/Mid/End labels or their 1/2/3 codes).
+    """
+    if "which_time_span_encoded" in df.columns:
+        span = df["which_time_span_encoded"]
+    else:
+        span = df["which_time_span"]
+        if not pd.api.types.is_numeric_dtype(span):  # object, or pandas 3's str dtype
+            span = span.astype(str).str.strip().str.title().map(TIME_SPAN_MAPPING)
+    if span.isna().any():
+        raise ValueError("unknown time span value(s); expected Early/Mid/End or 1/2/3")
+
+    out = np.empty((len(df), len(RAW_COLUMNS)), dtype=np.float64)
+    out[:, :15] = df[COUNTER_COLUMNS].to_numpy(dtype=np.float64)
+    out[:, 15] = span.to_numpy(dtype=np.float64)
+    return out
+
+
+# -------------------------
+# Parity check against the training formulas
+# -------------------------
+def _training_features(df):
+    """Reference implementation written the way the training notebook does it."""
+    df = df.copy()
+    for level in LEVELS:
+        total = df[f"total_{level}_exercise"]
+        df[f"{level}_completion_ratio"] = (df[f"completed_{level}_exercise"] / total).where(total != 0, 0)
+    for level in LEVELS:
+        df[f"{level}_effort_efficiency"] = df[f"{level}_exercise_completion_time"] / (df[f"completed_{level}_exercise"] + 1)
+    for level in LEVELS:
+        df[f"{level}_error_rate"] = df[f"{level}_exercise_syntax_error"] / (df[f"{level}_exercise_attempt"] + 1)
+    df["completed_weighted_score"] = df["completed_easy_exercise"]*1 + df["completed_medium_exercise"]*2 + df["completed_hard_exercise"]*3
+    df["attempts_weighted_score"] = df["easy_exercise_attempt"]*1 + df["medium_exercise_attempt"]*2 + df["hard_exercise_attempt"]*3
+    df["syntax_error_weighted_score"] = df["easy_exercise_syntax_error"]*1 + df["medium_exercise_syntax_error"]*2 + df["hard_exercise_syntax_error"]*3
+    df["total_completed_all"] = df["completed_easy_exercise"] + df["completed_medium_exercise"] + df["completed_hard_exercise"]
+    df["total_attempt_all"] = df["easy_exercise_attempt"] + df["medium_exercise_attempt"] + df["hard_exercise_attempt"]
+    df["total_error_all"] = df["easy_exercise_syntax_error"] + df["medium_exercise_syntax_error"] + df["hard_exercise_syntax_error"]
+    df["overall_efficiency"] = df["total_completed_all"] / (df["total_attempt_all"] + 1)
+    return df[FEATURE_COLUMNS]
+
+
+def check_parity(n_rows=10000, seed=0):
+    """Compare build_features with the training formulas on random counters."""
+    rng = np.random.default_rng(seed)
+    raw = rng.integers(0, 50, size=(n_rows, len(RAW_COLUMNS))).astype(np.float64)
+    raw[:, 15] = rng.integers(1, 4, size=n_rows)
+    raw[: n_rows // 10, 0] = 0  # make sure zero-total rows are covered
+    expected = _training_features(pd.DataFrame(raw, columns=RAW_COLUMNS)).to_numpy(dtype=np.float64)
+    got = build_features(raw)
+    max_abs = float(np.max(np.abs(got - expected)))
+    if not np.allclose(got, expected, rtol=0, atol=1e-12):
+        raise AssertionError(f"feature builder diverges from training formulas (max abs diff {max_abs})")
+    return max_abs
+
+
+if __name__ == "__main__":
+    print(f"parity OK (max abs diff {check_parity():.2e})")
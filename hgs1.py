@@ -1,15 +1,20 @@
 # app_embedded.py
 import streamlit as st
-import pandas as pd
-import joblib
 import os
 
+import metrics
+from model_store import load_model
+from prediction_cache import predict_one_cached
+
+# Prometheus-style metrics on 127.0.0.1:9464/metrics (see metrics.py)
+metrics.start_metrics_server()
+
 # -------------------
 # Load Model
 # -------------------
 MODEL_PATH = "stacking_model.pkl"
 if os.path.exists(MODEL_PATH):
-    model = joblib.load(MODEL_PATH)
+    model = load_model(MODEL_PATH)
 else:
     st.error(f"Model file not found: {MODEL_PATH}")
     st.stop()
@@ -113,51 +118,21 @@ with tab1:
     st.markdown("</div>", unsafe_allow_html=True)
 
     if st.button("🔮 Predict Performance", use_container_width=True):
-        x = {
-            "total_easy_exercise": total_easy_exercise,
-            "completed_easy_exercise": completed_easy_exercise,
-            "easy_exercise_completion_time": easy_exercise_completion_time,
-            "easy_exercise_attempt": easy_exercise_attempt,
-            "easy_exercise_syntax_error": easy_exercise_syntax_error,
-            "total_medium_exercise": total_medium_exercise,
-            "completed_medium_exercise": completed_medium_exercise,
-            "medium_exercise_completion_time": medium_exercise_completion_time,
-            "medium_exercise_attempt": medium_exercise_attempt,
-            "medium_exercise_syntax_error": medium_exercise_syntax_error,
-            "total_hard_exercise": total_hard_exercise,
-            "completed_hard_exercise": completed_hard_exercise,
-            "hard_exercise_completion_time": hard_exercise_completion_time,
-            "hard_exercise_attempt": hard_exercise_attempt,
-            "hard_exercise_syntax_error": hard_exercise_syntax_error,
-            "easy_completion_ratio": (completed_easy_exercise / total_easy_exercise) if total_easy_exercise else 0,
-            "medium_completion_ratio": (completed_medium_exercise / total_medium_exercise) if total_medium_exercise else 0,
-            "hard_completion_ratio": (completed_hard_exercise / total_hard_exercise) if total_hard_exercise else 0,
-            "easy_effort_efficiency": easy_exercise_completion_time / (completed_easy_exercise + 1),
-            "medium_effort_efficiency": medium_exercise_completion_time / (completed_medium_exercise + 1),
-            "hard_effort_efficiency": hard_exercise_completion_time / (completed_hard_exercise + 1),
-            "easy_error_rate": easy_exercise_syntax_error / (easy_exercise_attempt + 1),
-            "medium_error_rate": medium_exercise_syntax_error / (medium_exercise_attempt + 1),
-            "hard_error_rate": hard_exercise_syntax_error / (hard_exercise_attempt + 1),
-            "completed_weighted_score": completed_easy_exercise*1 + completed_medium_exercise*2 + completed_hard_exercise*3,
-            "attempts_weighted_score": easy_exercise_attempt*1 + medium_exercise_attempt*2 + hard_exercise_attempt*3,
-            "syntax_error_weighted_score": easy_exercise_syntax_error*1 + medium_exercise_syntax_error*2 + hard_exercise_syntax_error*3,
-            "which_time_span_encoded": which_time_span_encoded,
-            "total_completed_all": completed_easy_exercise + completed_medium_exercise + completed_hard_exercise,
-            "total_attempt_all": easy_exercise_attempt + medium_exercise_attempt + hard_exercise_attempt,
-            "total_error_all": easy_exercise_syntax_error + medium_exercise_syntax_error + hard_exercise_syntax_error,
-            "overall_efficiency": (completed_easy_exercise + completed_medium_exercise + completed_hard_exercise) / (easy_exercise_attempt + medium_exercise_attempt + hard_exercise_attempt + 1),
-        }
-        df = pd.DataFrame([x])
+        raw = [[
+            total_easy_exercise, completed_easy_exercise, easy_exercise_completion_time, easy_exercise_attempt, easy_exercise_syntax_error,
+            total_medium_exercise, completed_medium_exercise, medium_exercise_completion_time, medium_exercise_attempt, medium_exercise_syntax_error,
+            total_hard_exercise, completed_hard_exercise, hard_exercise_completion_time, hard_exercise_attempt, hard_exercise_syntax_error,
+            which_time_span_encoded,
+        ]]
         try:
-            prediction = model.predict(df)[0]
-            prob = None
-            if hasattr(model, "predict_proba"):
-                prob = model.predict_proba(df)[0][1]
-            st.markdown(f"<div class='prediction-box'>Prediction: {prediction}</div>", unsafe_allow_html=True)
-            if prob is not None:
-                st.markdown(f"<div class='prediction-box'>Success Probability: {prob:.2f}</div>", unsafe_allow_html=True)
-            else:
-                st.info("Model has no predict_proba; only class prediction displayed.")
+            with metrics.track_request("hgs1"):
+                prediction, prob = predict_one_cached(raw, MODEL_PATH)
+                with metrics.stage("render"):
+                    st.markdown(f"<div class='prediction-box'>Prediction: {prediction}</div>", unsafe_allow_html=True)
+                    if prob is not None:
+                        st.markdown(f"<div class='prediction-box'>Success Probability: {prob:.2f}</div>", unsafe_allow_html=True)
+                    else:
+                        st.info("Model has no predict_proba; only class prediction displayed.")
         except Exception as e:
             st.error(f"Model prediction error: {e}")
 
@@ -177,10 +152,11 @@ with tab2:
     for step in timeline_items:
         st.markdown(f"<div class='timeline-item'>✔️ {step}</div>", unsafe_allow_html=True)
 
-# TAB 3 — Model Output Dashboard (placeholders)
+# TAB 3 — Model Output Dashboard (live metrics on the held-out set, cached per model/data hash)
 with tab3:
     st.markdown("<div class='section-title'>📊 Model Output Dashboard</div>", unsafe_allow_html=True)
-    st.info("Placeholders. Add your evaluation graphs / metrics here (confusion matrix, feature importances, etc.).")
+    from evaluation_view import render_live_evaluation
+    render_live_evaluation(MODEL_PATH)
 
 # TAB 4 — Model Summary
 with tab4:
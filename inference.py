@@ -0,0 +1,36 @@
+# inference.py
+# One ensemble pass per prediction: the class label is derived from the
+# success probability instead of calling predict() and predict_proba()
+# separately (which runs every base learner and the meta-learner twice).
+import os
+
+import numpy as np
+
+# Probability of the positive class ("Pass") at or above which a student is
+# labelled as passing. Override per call or with PREDICTION_THRESHOLD.
+DEFAULT_THRESHOLD = float(os.environ.get("PREDICTION_THRESHOLD", "0.5"))
+
+
+def predict_with_proba(model, X, threshold=None):
+    """Return (labels, success_probabilities) for every row of X.
+
+    Models without predict_proba fall back to predict(), in which case the
+    probabilities are None.
+    """
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLD
+    if not hasattr(model, "predict_proba"):
+        return np.asarray(model.predict(X)), None
+
+    proba = np.asarray(model.predict_proba(X))[:, 1]
+    classes = getattr(model, "classes_", None)
+    if classes is None:
+        classes = np.array([0, 1])
+    labels = np.where(proba >= threshold, classes[1], classes[0])
+    return labels, proba
+
+
+def predict_one(model, X, threshold=None):
+    """Single-row convenience wrapper: returns (label, probability or None)."""
+    labels, proba = predict_with_proba(model, X, threshold)
+    return labels[0], (None if proba is None else float(proba[0]))
@@ -0,0 +1,138 @@
+# latency_profile.py
+# Accuracy-versus-latency profile of cheaper stacking variants.
+#
+# Every single-student request pays for all five base learners, including
+# SVC(probability=True) and the MLP. This trains stacking variants built
+# from base-learner subsets and smaller tree counts, measures their held-out
+# F1/ROC AUC and their per-row and batch latency through the serving path
+# (inference.predict_with_proba), and marks the Pareto-optimal ones for F1
+# and for ROC AUC (pareto_f1 / pareto_roc_auc in pareto.csv), so the
+# serving model can be chosen with evidence instead of by best F1 alone.
+#
+# Run through train.py:  python train.py --data ds1.csv --latency-profile
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+TREE_LEARNERS = {"RandomForest", "GradientBoosting", "XGBoost"}
+TREE_SCALES = [1.0, 0.5, 0.25]
+BASE_SUBSETS = [
+    ["RandomForest", "GradientBoosting", "MLP", "SVM", "XGBoost"],
+    ["RandomForest", "GradientBoosting", "MLP", "XGBoost"],  # no SVM
+    ["RandomForest", "GradientBoosting", "XGBoost"],         # trees only
+    ["GradientBoosting", "XGBoost"],
+    ["RandomForest", "XGBoost"],
+    ["XGBoost", "MLP"],
+]
+SHORT_NAMES = {"RandomForest": "RF", "GradientBoosting": "GB", "MLP": "MLP", "SVM": "SVM", "XGBoost": "XGB"}
+
+
+def scale_trees(best_params, factor):
+    """Copy of best_params with n_estimators of the tree ensembles scaled by `factor`."""
+    scaled = {}
+    for name, params in best_params.items():
+        params = dict(params)
+        if name in TREE_LEARNERS and factor != 1.0:
+            n = params.get("model__n_estimators", 100)
+            params["model__n_estimators"] = max(10, int(round(n * factor)))
+        scaled[name] = params
+    return scaled
+
+
+def variant_specs(available, scales=TREE_SCALES, subsets=BASE_SUBSETS):
+    specs = []
+    for subset in subsets:
+        subset = [n for n in subset if n in available]
+        if len(subset) < 2:
+            continue
+        has_trees = any(n in TREE_LEARNERS for n in subset)
+        for scale in (scales if has_trees else [1.0]):
+            name = "+".join(SHORT_NAMES[n] for n in subset) + f"@{scale:g}"
+            if name not in {s["name"] for s in specs}:
+                specs.append({"name": name, "base_learners": subset, "tree_scale": scale})
+    return specs
+
+
+def benchmark_latency(model, X, n_single=200, batch_rows=10000, repeat=3):
+    """Median single-row latency (ms) and best-of-`repeat` batch throughput."""
+    from inference import predict_with_proba
+
+    n_single = min(n_single, len(X))
+    single = []
+    for i in range(n_single):
+        row = X.iloc[[i]]
+        start = time.perf_counter()
+        predict_with_proba(model, row)
+        single.append(time.perf_counter() - start)
+
+    reps = int(np.ceil(batch_rows / len(X)))
+    batch = pd.concat([X] * reps, ignore_index=True).iloc[:batch_rows]
+    batch_seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict_with_proba(model, batch)
+        batch_seconds.append(time.perf_counter() - start)
+    best = min(batch_seconds)
+    return {
+        "latency_ms_row_p50": float(np.median(single) * 1000),
+        "latency_ms_row_p95": float(np.percentile(single, 95) * 1000),
+        "batch_rows": int(len(batch)),
+        "batch_seconds": float(best),
+        "batch_rows_per_second": float(len(batch) / best),
+    }
+
+
+def pareto_front(rows, score="f1", cost="latency_ms_row_p50"):
+    """Flag rows not dominated by another row (higher-or-equal score at lower-or-equal cost).
+
+    The flag is stored under f"pareto_{score}", so fronts for several scores can coexist.
+    """
+    for r in rows:
+        r[f"pareto_{score}"] = not any(
+            o is not r and o[score] >= r[score] and o[cost] <= r[cost] and (o[score] > r[score] or o[cost] < r[cost])
+            for o in rows)
+    return rows
+
+
+def run_latency_profile(best_params, zoo, X, y, X_hold, y_hold, workdir, runner, n_jobs=-1):
+    """Train, evaluate and benchmark every variant; writes pareto.csv and variant artifacts."""
+    import model_store
+    from evaluation import evaluate_model
+    from train import build_stacking
+
+    out_dir = os.path.join(workdir, "variants")
+    os.makedirs(out_dir, exist_ok=True)
+
+    def profile(spec):
+        model = build_stacking(scale_trees(best_params, spec["tree_scale"]), zoo, spec["base_learners"], n_jobs)
+        start = time.perf_counter()
+        model.fit(X, y)
+        fit_seconds = time.perf_counter() - start
+        report = evaluate_model(model, X_hold, y_hold, threshold=0.5)
+        path = model_store.export_artifact(model, os.path.join(out_dir, f"{spec['name']}.pkl"))
+        return {"variant": spec["name"], "base_learners": "+".join(spec["base_learners"]),
+                "tree_scale": spec["tree_scale"], "f1": report["f1"], "roc_auc": report["roc_auc"],
+                "accuracy": report["accuracy"], "fit_seconds": fit_seconds, "artifact": path,
+                "size_mb": os.path.getsize(path) / 2**20, **benchmark_latency(model, X_hold)}
+
+    def inputs(spec):
+        # the variant's own (scaled) params: re-tuning a base learner invalidates it
+        scaled = scale_trees(best_params, spec["tree_scale"])
+        return {"spec": spec, "params": {n: scaled[n] for n in spec["base_learners"]}}
+
+    rows = [runner.run(f"latency:{spec['name']}", lambda: profile(spec), inputs=inputs(spec),
+                       outputs=[os.path.join(out_dir, f"{spec['name']}.pkl")])
+            for spec in variant_specs([n for n in zoo if n in best_params])]
+    for score in ("f1", "roc_auc"):
+        rows = pareto_front(rows, score)
+    table = pd.DataFrame(rows).sort_values("latency_ms_row_p50").reset_index(drop=True)
+    table.to_csv(os.path.join(workdir, "pareto.csv"), index=False)
+
+    print("\nF1 / ROC AUC vs latency (F / A = Pareto-optimal for F1 / ROC AUC):")
+    marks = table["pareto_f1"].map({True: "F", False: "-"}) + table["pareto_roc_auc"].map({True: "A", False: "-"})
+    shown = table.assign(variant=marks + " " + table["variant"])
+    print(shown[["variant", "f1", "roc_auc", "latency_ms_row_p50", "latency_ms_row_p95",
+                 "batch_rows_per_second", "size_mb"]].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    return table
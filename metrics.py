@@ -0,0 +1,401 @@
+# metrics.py
+# In-process Prometheus-style metrics for prediction traffic.
+#
+# Counters, gauges and histograms live in one process-wide registry and are
+# rendered in the Prometheus text exposition format (version 0.0.4) on
+# http://127.0.0.1:9464/metrics (MLINCS_METRICS_HOST / MLINCS_METRICS_PORT,
+# MLINCS_METRICS_PORT=0 disables the endpoint). Every Streamlit page calls
+# start_metrics_server(); the first call in a process binds the port.
+#
+#   python metrics.py --scrape                # print the current samples
+#   python metrics.py --self-check            # record, serve, scrape, compare
+#
+# No third-party client library: the pages already run in one process per
+# app, and the format is small enough to write directly.
+import argparse
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_HOST = os.environ.get("MLINCS_METRICS_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.environ.get("MLINCS_METRICS_PORT", "9464"))
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(v):
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def labels(self, **labels):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            return child
+
+    def _default(self):
+        return self._children[()]
+
+    def collect(self):
+        with self._lock:
+            children = list(self._children.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in children:
+            lines.extend(child.samples(self.name, self.labelnames, key))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount=1.0):
+        if amount < 0:
+            raise ValueError("counters can only increase")
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, labelnames, key):
+        return [f"{name}{_format_labels(labelnames, key)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+    _new_child = staticmethod(_CounterChild)
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value):
+        with self._lock:
+            self.value = float(value)
+
+    def set_function(self, fn):
+        """Compute the value at scrape time."""
+        self.function = fn
+
+    def samples(self, name, labelnames, key):
+        value = self.function() if self.function is not None else self.value
+        return [f"{name}{_format_labels(labelnames, key)} {_format_value(value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    _new_child = staticmethod(_GaugeChild)
+
+    def set(self, value):
+        self._default().set(value)
+
+    def set_function(self, fn):
+        self._default().set_function(fn)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self, name, labelnames, key):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines, cumulative = [], 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            le = "+Inf" if math.isinf(bound) else repr(bound)
+            lines.append(f"{name}_bucket{_format_labels(labelnames, key, [('le', le)])} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, key)} {count}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets)) + ((math.inf,) if not math.isinf(max(buckets)) else ())
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for m in metrics for line in m.collect()) + "\n"
+
+
+REGISTRY = Registry()
+
+# -------------------------
+# Prediction metrics
+# -------------------------
+REQUESTS = REGISTRY.register(Counter(
+    "mlincs_prediction_requests_total", "Prediction requests handled, by page.", ["page"]))
+ERRORS = REGISTRY.register(Counter(
+    "mlincs_prediction_errors_total", "Prediction requests that raised, by page and exception type.", ["page", "error"]))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "mlincs_prediction_request_seconds", "End-to-end prediction request latency, by page.", ["page"]))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "mlincs_prediction_stage_seconds", "Latency of feature building, inference and rendering.", ["stage"]))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "mlincs_prediction_cache_lookups_total", "Prediction cache lookups, by result (hit/miss).", ["result"]))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    "mlincs_prediction_cache_hit_ratio", "Share of prediction cache lookups answered from the cache."))
+MODEL_LOADS = REGISTRY.register(Counter(
+    "mlincs_model_loads_total", "Model artifact deserializations, by result (ok/error).", ["result"]))
+MODEL_LOAD_SECONDS = REGISTRY.register(Histogram(
+    "mlincs_model_load_seconds", "Time to deserialize the model artifact.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)))
+
+
+def _cache_hit_ratio():
+    hits = CACHE_LOOKUPS.labels(result="hit").value
+    total = hits + CACHE_LOOKUPS.labels(result="miss").value
+    return hits / total if total else 0.0
+
+
+CACHE_HIT_RATIO.set_function(_cache_hit_ratio)
+
+
+@contextmanager
+def track_request(page):
+    """Count and time one prediction request; exceptions are counted and re-raised."""
+    REQUESTS.labels(page=page).inc()
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        ERRORS.labels(page=page, error=type(e).__name__).inc()
+        raise
+    finally:
+        REQUEST_SECONDS.labels(page=page).observe(time.perf_counter() - start)
+
+
+def stage(name):
+    """Context manager timing one stage (features / inference / render)."""
+    return STAGE_SECONDS.labels(stage=name).time()
+
+
+# -------------------------
+# Exposition endpoint
+# -------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=DEFAULT_PORT, host=DEFAULT_HOST):
+    """Serve /metrics from a daemon thread, once per process; returns the server or None.
+
+    A port already taken (e.g. by a second app process) is not an error:
+    that process simply keeps its metrics unexposed.
+    """
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError:
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        _server = server
+        return server
+
+
+# -------------------------
+# Scrape helper (local stand-in for a Prometheus scraper)
+# -------------------------
+def parse_text(text):
+    """Parse exposition text into {(sample_name, ((label, value), ...)): float}."""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        name_labels, value = line.rsplit(" ", 1)
+        labels = ()
+        if "{" in name_labels:
+            name, rest = name_labels.split("{", 1)
+            pairs = []
+            for part in _split_labels(rest.rstrip("}")):
+                k, v = part.split("=", 1)
+                pairs.append((k, v[1:-1].replace('\\"', '"').replace("\\n", "\n").replace("\\\\", "\\")))
+            labels = tuple(sorted(pairs))
+        else:
+            name = name_labels
+        samples[(name, labels)] = float(value)
+    return samples
+
+
+def _split_labels(s):
+    parts, current, quoted, escaped = [], "", False, False
+    for ch in s:
+        if escaped:
+            current += ch
+            escaped = False
+        elif ch == "\\":
+            current += ch
+            escaped = True
+        elif ch == '"':
+            current += ch
+            quoted = not quoted
+        elif ch == "," and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+    if current:
+        parts.append(current)
+    return parts
+
+
+def scrape(url=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}/metrics", timeout=5.0):
+    from urllib.request import urlopen
+
+    with urlopen(url, timeout=timeout) as resp:
+        return parse_text(resp.read().decode("utf-8"))
+
+
+def self_check():
+    """Record known traffic, serve it on a free port, scrape it back and compare."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        for _ in range(3):
+            with track_request("self_check"):
+                with stage("inference"):
+                    pass
+        try:
+            with track_request("self_check"):
+                raise KeyError("boom")
+        except KeyError:
+            pass
+        CACHE_LOOKUPS.labels(result="hit").inc(3)
+        CACHE_LOOKUPS.labels(result="miss").inc(1)
+        samples = scrape(f"http://127.0.0.1:{server.server_address[1]}/metrics")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    page = (("page", "self_check"),)
+    assert samples[("mlincs_prediction_requests_total", page)] >= 4
+    assert samples[("mlincs_prediction_errors_total", (("error", "KeyError"), ("page", "self_check")))] >= 1
+    assert samples[("mlincs_prediction_request_seconds_count", page)] >= 4
+    assert samples[("mlincs_prediction_request_seconds_bucket", (("le", "+Inf"), ("page", "self_check")))] >= 4
+    assert samples[("mlincs_prediction_stage_seconds_count", (("stage", "inference"),))] >= 3
+    assert 0.0 < samples[("mlincs_prediction_cache_hit_ratio", ())] <= 1.0
+    return samples
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape or self-check the prediction metrics endpoint.")
+    parser.add_argument("--url", default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}/metrics")
+    parser.add_argument("--scrape", action="store_true", help="fetch --url and print its samples")
+    parser.add_argument("--self-check", action="store_true", help="serve and scrape locally recorded metrics")
+    args = parser.parse_args(argv)
+
+    if args.self_check:
+        samples = self_check()
+        print(f"OK: {len(samples)} samples scraped and checked")
+    if args.scrape or not args.self_check:
+        for (name, labels), value in sorted(scrape(args.url).items()):
+            print(f"{name}{_format_labels([k for k, _ in labels], [v for _, v in labels])} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# model_store.py
+# Process-wide model cache shared by every Streamlit page and script.
+#
+# Streamlit re-executes the page script on every widget interaction, but
+# imported modules stay in sys.modules for the lifetime of the server
+# process. Keeping the deserialized model here means the ensemble is
+# unpickled once per process and reused across reruns and sessions.
+#
+# Artifacts are always loaded fully into private memory (mmap_mode=None).
+# Memory-mapping does not pay off for this ensemble: libsvm needs writable
+# buffers (a read-only SVC fails in predict_proba), Tree.__setstate__ copies
+# the node tables anyway, GradientBoosting keeps its trees in an object
+# array and XGBoost pickles its booster as a bytearray. Measured with
+# `python model_store.py compare`, an uncompressed and a compress=3 copy of
+# the production stack cost the same ~110 MB Rss/Private_Dirty per process.
+import hashlib
+import os
+import sys
+import threading
+import time
+
+import metrics
+
+DEFAULT_MODEL_PATH = "stacking_model.pkl"
+
+_lock = threading.Lock()
+_cache = {}  # absolute path -> cache entry
+
+
+# -------------------------
+# Helpers
+# -------------------------
+def _rss_bytes():
+    """Current resident set size of this process, or None if unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is the peak, in bytes on macOS and kilobytes elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def is_uncompressed(path):
+    """True for uncompressed joblib pickles.
+
+    Compressed joblib files start with a zlib/gzip/bz2/xz/lz4 header, plain
+    pickles with the PROTO opcode (0x80).
+    """
+    with open(path, "rb") as f:
+        return f.read(1) == b"\x80"
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file, read in chunks so large artifacts stay cheap."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# -------------------------
+# Cached loader
+# -------------------------
+def load_model(path=DEFAULT_MODEL_PATH):
+    """Return the model stored at `path`, deserializing it at most once.
+
+    The file is only re-read when its mtime/size changes, and only
+    re-unpickled when its content hash changes as well (re-saving the
+    same bytes, e.g. from the sidebar uploader, keeps the cached model).
+    """
+    key = os.path.abspath(path)
+    stat = os.stat(key)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry["stamp"] == stamp:
+            return entry["model"]
+
+        digest = file_hash(key)
+        if entry is not None and entry["sha256"] == digest:
+            entry["stamp"] = stamp
+            return entry["model"]
+
+        import joblib  # imported lazily: pages that never predict should not pay for it
+
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            model = joblib.load(key, mmap_mode=None)
+        except Exception:
+            metrics.MODEL_LOADS.labels(result="error").inc()
+            raise
+        load_seconds = time.perf_counter() - start
+        metrics.MODEL_LOADS.labels(result="ok").inc()
+        import profiling
+        if profiling.ENABLED:
+            profiling.instrument(model)  # MLINCS_PROFILE=1: time every component in every process
+        metrics.MODEL_LOAD_SECONDS.observe(load_seconds)
+        rss_after = _rss_bytes()
+
+        _cache[key] = {
+            "model": model,
+            "stamp": stamp,
+            "sha256": digest,
+            "path": key,
+            "size_bytes": stat.st_size,
+            "compressed": not is_uncompressed(key),
+            "load_seconds": load_seconds,
+            "rss_bytes": rss_after,
+            "rss_delta_bytes": (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+            "loaded_at": time.time(),
+            "loads": (entry["loads"] + 1) if entry is not None else 1,
+        }
+        return model
+
+
+def model_info(path=DEFAULT_MODEL_PATH):
+    """Load statistics for a cached model (without the model itself), or None."""
+    entry = _cache.get(os.path.abspath(path))
+    if entry is None:
+        return None
+    return {k: v for k, v in entry.items() if k != "model"}
+
+
+def model_hash(path=DEFAULT_MODEL_PATH):
+    """Content hash of the model currently cached for `path`."""
+    load_model(path)
+    return _cache[os.path.abspath(path)]["sha256"]
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+
+
+# -------------------------
+# Artifact export
+# -------------------------
+def export_artifact(model, path):
+    """Dump `model` uncompressed, so loading it skips decompression.
+
+    The file is written next to the target and renamed into place: a process
+    that is reading the previous artifact never sees it truncated under it.
+    """
+    import joblib
+
+    tmp = f"{path}.tmp-{os.getpid()}"
+    try:
+        joblib.dump(model, tmp, compress=0)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path
+
+
+_PROBE = """
+import json, sys, time
+sys.path.insert(0, %r)
+import model_store
+start = time.perf_counter()
+model_store.load_model(%r)
+load_seconds = time.perf_counter() - start
+print(json.dumps({"load_seconds": load_seconds}), flush=True)
+sys.stdin.readline()  # wait until every probe has loaded, so sharing is visible
+mem = {}
+with open("/proc/self/smaps_rollup") as f:
+    for line in f:
+        parts = line.split()
+        if parts[0] in ("Rss:", "Pss:", "Shared_Clean:", "Private_Clean:", "Private_Dirty:"):
+            mem[parts[0].rstrip(":").lower() + "_mb"] = int(parts[1]) / 1024
+print(json.dumps(mem), flush=True)
+"""
+
+
+def compare_artifacts(paths, processes=4):
+    """Load each artifact in `processes` concurrent fresh interpreters and
+    report mean load time and per-process memory (Linux only for Pss)."""
+    import json
+    import subprocess
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    report = {}
+    for path in paths:
+        code = _PROBE % (here, os.path.abspath(path))
+        procs = [subprocess.Popen([sys.executable, "-c", code], stdin=subprocess.PIPE,
+                                  stdout=subprocess.PIPE, text=True) for _ in range(processes)]
+        loads = [json.loads(p.stdout.readline()) for p in procs]
+        for p in procs:
+            p.stdin.write("\n")
+            p.stdin.flush()
+        mems = [json.loads(p.stdout.readline() or "{}") for p in procs]
+        for p in procs:
+            p.wait()
+        row = {"compressed": not is_uncompressed(path), "size_mb": os.path.getsize(path) / 2**20,
+               "load_seconds": sum(l["load_seconds"] for l in loads) / len(loads)}
+        for k in (mems[0] if mems else {}):
+            row[k] = sum(m.get(k, 0.0) for m in mems) / len(mems)
+        report[path] = row
+    return report
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Model artifact tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_export = sub.add_parser("export", help="re-dump a model uncompressed (atomic write, no decompression on load)")
+    p_export.add_argument("source")
+    p_export.add_argument("target")
+    p_compare = sub.add_parser("compare", help="compare load time and RSS/PSS of artifacts across processes")
+    p_compare.add_argument("paths", nargs="+")
+    p_compare.add_argument("--processes", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        import joblib
+        export_artifact(joblib.load(args.source), args.target)
+        print(f"Wrote {args.target} ({os.path.getsize(args.target) / 2**20:.1f} MB, uncompressed)")
+    else:
+        print(json.dumps(compare_artifacts(args.paths, args.processes), indent=2))
+
+
+if __name__ == "__main__":
+    main()
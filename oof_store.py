@@ -0,0 +1,99 @@
+# oof_store.py
+# Persisted out-of-fold (OOF) predictions of the stacking base learners.
+#
+# StackingClassifier trains its meta-learner on cross_val_predict output of
+# every base learner. With the same CV splitter, those OOF probabilities
+# only depend on the learner, its parameters and the training data, so they
+# are stored on disk under a key of exactly that. Meta-learner experiments
+# and base-learner subset searches then reuse them and run in seconds
+# instead of refitting RF, GB, MLP, SVM and XGBoost inside CV.
+import hashlib
+import itertools
+import json
+import os
+
+import numpy as np
+
+from evaluation import CACHE_DIR
+
+
+def _plain(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return None  # nested estimators etc. are covered by their own flattened params
+
+
+def estimator_key(estimator, data_hash, cv):
+    """Content key for (estimator class + params, data, CV splitter)."""
+    params = estimator.get_params(deep=True)
+    steps = getattr(estimator, "steps", None)
+    classes = [type(s).__name__ for _, s in steps] if steps else [type(estimator).__name__]
+    spec = {
+        "classes": classes,
+        "params": {k: _plain(v) for k, v in sorted(params.items()) if k != "memory"},
+        "data": data_hash,
+        "cv": [type(cv).__name__, getattr(cv, "n_splits", None),
+               getattr(cv, "shuffle", None), getattr(cv, "random_state", None)],
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class OOFStore:
+    def __init__(self, cache_dir=os.path.join(CACHE_DIR, "oof")):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def predictions(self, name, estimator, X, y, cv, data_hash, n_jobs=-1):
+        """OOF P(pass) of `estimator` on (X, y), computed once per key."""
+        key = estimator_key(estimator, data_hash, cv)
+        path = os.path.join(self.cache_dir, f"{key}.npy")
+        if os.path.exists(path):
+            self.hits += 1
+            return np.load(path)
+
+        from sklearn.model_selection import cross_val_predict
+
+        self.misses += 1
+        oof = cross_val_predict(estimator, X, y, cv=cv, method="predict_proba", n_jobs=n_jobs)[:, 1]
+        np.save(path + ".tmp.npy", oof)
+        os.replace(path + ".tmp.npy", path)
+        with open(os.path.join(self.cache_dir, f"{key}.json"), "w") as f:
+            json.dump({"name": name, "data": data_hash, "rows": int(len(oof))}, f)
+        return oof
+
+
+def default_meta_learners():
+    from sklearn.linear_model import LogisticRegression
+    return {f"LogisticRegression(C={c})": LogisticRegression(C=c, max_iter=2000) for c in (0.01, 0.1, 1.0, 10.0)}
+
+
+def meta_search(oof, y, meta_learners=None, min_learners=2, cv=None, n_jobs=-1):
+    """Score every (base-learner subset, meta-learner) pair on stored OOF columns.
+
+    `oof` maps base-learner name -> OOF probability vector. Returns rows
+    sorted by mean CV F1 (best first).
+    """
+    from sklearn.model_selection import StratifiedKFold, cross_validate
+
+    meta_learners = meta_learners or default_meta_learners()
+    cv = cv or StratifiedKFold(n_splits=5, shuffle=True, random_state=0)
+    names = list(oof)
+    rows = []
+    for k in range(min_learners, len(names) + 1):
+        for subset in itertools.combinations(names, k):
+            Z = np.column_stack([oof[n] for n in subset])
+            for meta_name, meta in meta_learners.items():
+                scores = cross_validate(meta, Z, y, cv=cv, scoring=["f1", "roc_auc"], n_jobs=n_jobs)
+                rows.append({
+                    "base_learners": "+".join(subset),
+                    "meta_learner": meta_name,
+                    "cv_f1": float(scores["test_f1"].mean()),
+                    "cv_roc_auc": float(scores["test_roc_auc"].mean()),
+                })
+    return sorted(rows, key=lambda r: r["cv_f1"], reverse=True)
@@ -0,0 +1,164 @@
+# parallel_stack.py
+# Stacking prediction with the base learners evaluated concurrently.
+#
+# StackingClassifier.predict_proba runs RF, GB, MLP, SVM and XGBoost one
+# after another before the meta-learner. They are independent, so
+# ParallelStacking fans them out over a thread or process pool and then
+# applies final_estimator_ to the same meta-features sklearn would build
+# (stack_method_ per learner, P(pass) column only for binary predict_proba,
+# `passthrough` respected). It exposes classes_ / predict_proba / predict,
+# so inference.predict_with_proba and serve.py use it unchanged.
+#
+#   python parallel_stack.py --mode thread --workers 5    # benchmark vs sequential
+#
+# Threads share the loaded model and rely on sklearn/numpy/xgboost
+# releasing the GIL; processes load their own private copy through
+# model_store and pay for shipping X to every worker.
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from model_store import DEFAULT_MODEL_PATH, load_model
+
+MODES = ["thread", "process"]
+DEFAULT_MODE = os.environ.get("PARALLEL_STACK_MODE", "thread")
+DEFAULT_WORKERS = int(os.environ.get("PARALLEL_STACK_WORKERS", "0")) or None  # None: one per base learner
+
+_worker = {}
+
+
+def _init_worker(model_path):
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+    _worker["model"] = load_model(model_path)
+
+
+def _worker_predict(index, X):
+    model = _worker["model"]
+    return getattr(model.estimators_[index], model.stack_method_[index])(X)
+
+
+def _meta_column(preds, method, n_classes):
+    # same shaping as StackingClassifier._concatenate_predictions
+    preds = np.asarray(preds)
+    if preds.ndim == 1:
+        return preds.reshape(-1, 1)
+    if method == "predict_proba" and n_classes == 2:
+        return preds[:, 1:]
+    return preds
+
+
+class ParallelStacking:
+    """A fitted StackingClassifier whose base learners predict concurrently."""
+
+    def __init__(self, model, mode=DEFAULT_MODE, max_workers=DEFAULT_WORKERS, model_path=None):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        if mode == "process" and model_path is None:
+            raise ValueError("process mode needs model_path so workers can load the model")
+        self.model = model
+        self.mode = mode
+        self.classes_ = model.classes_
+        self._jobs = [(i, est, meth) for i, (est, meth) in enumerate(zip(model.estimators_, model.stack_method_))
+                      if est != "drop"]
+        workers = max_workers or len(self._jobs)
+        if mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stack")
+        else:
+            self._pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,))
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def transform(self, X):
+        """Meta-features: base learner outputs (plus X when passthrough)."""
+        if self.mode == "thread":
+            futures = [self._pool.submit(getattr(est, meth), X) for _, est, meth in self._jobs]
+        else:
+            futures = [self._pool.submit(_worker_predict, i, X) for i, _, _ in self._jobs]
+        n_classes = len(self.classes_)
+        columns = [_meta_column(f.result(), meth, n_classes) for f, (_, _, meth) in zip(futures, self._jobs)]
+        if self.model.passthrough:
+            columns.append(np.asarray(X))
+        return np.hstack(columns)
+
+    def predict_proba(self, X):
+        return self.model.final_estimator_.predict_proba(self.transform(X))
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+# -------------------------
+# Benchmark
+# -------------------------
+def _median_seconds(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def benchmark(model_path=DEFAULT_MODEL_PATH, mode=DEFAULT_MODE, max_workers=DEFAULT_WORKERS,
+              batch_rows=10000, single_repeat=200, batch_repeat=5, X=None):
+    """Median latency of sequential vs parallel predict_proba for 1 row and `batch_rows` rows."""
+    import pandas as pd
+
+    from features import RAW_COLUMNS, build_feature_frame
+
+    model = load_model(model_path)
+    if X is None:
+        rng = np.random.default_rng(0)
+        raw = rng.integers(0, 60, size=(batch_rows, len(RAW_COLUMNS))).astype(np.float64)
+        raw[:, -1] = rng.integers(1, 4, size=batch_rows)
+        X = build_feature_frame(raw)
+    batch = pd.concat([X] * int(np.ceil(batch_rows / len(X))), ignore_index=True).iloc[:batch_rows]
+    row = batch.iloc[[0]]
+
+    with ParallelStacking(model, mode, max_workers, model_path) as parallel:
+        parallel.predict_proba(row)  # start the pool / load worker models before timing
+        max_diff = float(np.max(np.abs(parallel.predict_proba(batch) - model.predict_proba(batch))))
+        result = {"mode": mode, "workers": parallel._pool._max_workers, "max_abs_diff": max_diff}
+        for label, X_ in (("1_row", row), (f"{len(batch)}_rows", batch)):
+            repeat = single_repeat if len(X_) == 1 else batch_repeat
+            sequential = _median_seconds(lambda: model.predict_proba(X_), repeat)
+            concurrent = _median_seconds(lambda: parallel.predict_proba(X_), repeat)
+            result[label] = {"sequential_ms": sequential * 1000, "parallel_ms": concurrent * 1000,
+                             "speedup": sequential / concurrent}
+    return result
+
+
+def main(argv=None):
+    import json
+
+    parser = argparse.ArgumentParser(description="Benchmark concurrent base-learner prediction against StackingClassifier.")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--mode", choices=MODES, default=DEFAULT_MODE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="pool size (default: one per base learner)")
+    parser.add_argument("--rows", type=int, default=10000, help="batch size for the large-batch case")
+    parser.add_argument("--holdout", default=None, help="benchmark on these rows instead of random counters")
+    args = parser.parse_args(argv)
+
+    X = None
+    if args.holdout:
+        from distill import load_features
+        X, _ = load_features(args.holdout)
+    print(json.dumps(benchmark(args.model, args.mode, args.workers, args.rows, X=X), indent=2))
+
+
+if __name__ == "__main__":
+    main()
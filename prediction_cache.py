@@ -0,0 +1,106 @@
+# prediction_cache.py
+# Bounded LRU memoization in front of the model.
+#
+# Keys are the 16 raw inputs (15 counters + which_time_span_encoded), the
+# decision threshold and the content hash of the model file, so swapping
+# stacking_model.pkl invalidates every cached answer automatically. Rows
+# that miss are scored together in one vectorized pass.
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+import model_store
+from features import build_feature_frame
+from inference import DEFAULT_THRESHOLD, predict_with_proba
+from profiling import profiler
+
+DEFAULT_CAPACITY = int(os.environ.get("PREDICTION_CACHE_SIZE", "4096"))
+
+
+class PredictionCache:
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._model_key = None
+        self._lock = threading.Lock()
+
+    def predict(self, model, model_key, raw, threshold=None):
+        """Return (labels, probabilities) for an (N, 16) raw array."""
+        if threshold is None:
+            threshold = DEFAULT_THRESHOLD
+        raw = np.asarray(raw, dtype=np.float64)
+        if raw.ndim == 1:
+            raw = raw[np.newaxis, :]
+        keys = [(float(threshold),) + tuple(row) for row in raw.tolist()]
+
+        results = [None] * len(keys)
+        with self._lock:
+            if model_key != self._model_key:
+                # a different model file: nothing cached so far is valid
+                self._entries.clear()
+                self._model_key = model_key
+            for i, key in enumerate(keys):
+                hit = self._entries.get(key)
+                if hit is not None:
+                    self._entries.move_to_end(key)
+                    results[i] = hit
+            n_hits = sum(r is not None for r in results)
+            self.hits += n_hits
+            self.misses += len(keys) - n_hits
+        metrics.CACHE_LOOKUPS.labels(result="hit").inc(n_hits)
+        metrics.CACHE_LOOKUPS.labels(result="miss").inc(len(keys) - n_hits)
+
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            with metrics.stage("features"), profiler.section("features", len(missing)):
+                X = build_feature_frame(raw[missing])
+            with metrics.stage("inference"):
+                labels, proba = predict_with_proba(model, X, threshold)
+            with self._lock:
+                for j, i in enumerate(missing):
+                    results[i] = (labels[j], None if proba is None else float(proba[j]))
+                    if self._model_key == model_key:
+                        self._entries[keys[i]] = results[i]
+                        self._entries.move_to_end(keys[i])
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+
+        labels = np.array([r[0] for r in results])
+        proba = None if results[0][1] is None else np.array([r[1] for r in results])
+        return labels, proba
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "capacity": self.capacity,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+# Shared by every page in the process, like the model itself
+prediction_cache = PredictionCache()
+
+
+def predict_cached(raw, model_path=model_store.DEFAULT_MODEL_PATH, threshold=None):
+    """Cached (labels, probabilities) for raw rows, using the model stored at `model_path`."""
+    model = model_store.load_model(model_path)
+    return prediction_cache.predict(model, model_store.model_hash(model_path), raw, threshold)
+
+
+def predict_one_cached(raw, model_path=model_store.DEFAULT_MODEL_PATH, threshold=None):
+    labels, proba = predict_cached(raw, model_path, threshold)
+    return labels[0], (None if proba is None else float(proba[0]))
@@ -0,0 +1,159 @@
+# profiling.py
+# Opt-in timing of the inference path, per component.
+#
+# instrument(model) wraps predict / predict_proba / decision_function of a
+# loaded stacking model, of each fitted base learner and of the
+# meta-learner, and the feature build in prediction_cache / batch_scoring
+# reports through profiler.section("features"). Each component records
+# calls, rows, total/max time and the largest batch seen.
+#
+# Off by default: enable with MLINCS_PROFILE=1 or the Diagnostics panel in
+# accept1.py. With the environment variable, model_store.load_model
+# instruments every model it loads, so serve.py, score_cohort.py and the
+# pages are covered too (timings stay in the process that did the work).
+# Sessions share the profiler and the cached model, so the panel
+# goes through acquire()/release(): profiling stays on while at least one
+# session holds it, and a model is instrumented on its first acquire and
+# uninstrumented on its last release. The wrappers are instance attributes,
+# so an instrumented model must not be pickled.
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PROFILED_METHODS = ["predict", "predict_proba", "decision_function"]
+ENABLED = os.environ.get("MLINCS_PROFILE", "0") == "1"
+
+
+class Profiler:
+    def __init__(self, enabled=ENABLED):
+        self.always_on = enabled
+        self.holders = 0  # sessions that currently asked for profiling (see acquire)
+        self._lock = threading.Lock()
+        self._records = {}
+
+    @property
+    def enabled(self):
+        return self.always_on or self.holders > 0
+
+    def record(self, component, seconds, rows):
+        with self._lock:
+            r = self._records.setdefault(component, {"calls": 0, "rows": 0, "seconds": 0.0,
+                                                     "max_seconds": 0.0, "max_batch": 0})
+            r["calls"] += 1
+            r["rows"] += rows
+            r["seconds"] += seconds
+            r["max_seconds"] = max(r["max_seconds"], seconds)
+            r["max_batch"] = max(r["max_batch"], rows)
+
+    @contextmanager
+    def section(self, component, rows=0):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(component, time.perf_counter() - start, rows)
+
+    def snapshot(self):
+        """One dict per component, slowest total first."""
+        with self._lock:
+            rows = [{"component": name, **r,
+                     "mean_ms": r["seconds"] / r["calls"] * 1000 if r["calls"] else 0.0,
+                     "ms_per_row": r["seconds"] / r["rows"] * 1000 if r["rows"] else 0.0}
+                    for name, r in self._records.items()]
+        return sorted(rows, key=lambda r: r["seconds"], reverse=True)
+
+    def to_json(self):
+        return json.dumps({"enabled": self.enabled, "captured_at": time.time(), "components": self.snapshot()},
+                          indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._records.clear()
+
+
+profiler = Profiler()
+
+
+# -------------------------
+# Model instrumentation
+# -------------------------
+def _wrap(obj, component):
+    wrapped = []
+    for method in PROFILED_METHODS:
+        original = getattr(obj, method, None)
+        if original is None or method in vars(obj):
+            continue
+
+        def timed(X, *args, _original=original, _method=method, **kwargs):
+            with profiler.section(f"{component}.{_method}", len(X)):
+                return _original(X, *args, **kwargs)
+
+        setattr(obj, method, timed)
+        wrapped.append(method)
+    return wrapped
+
+
+def _components(model):
+    yield "model", model
+    estimators = getattr(model, "estimators_", None)
+    if estimators is not None and hasattr(model, "final_estimator_"):
+        names = [name for name, est in model.estimators if est != "drop"]
+        for name, est in zip(names, estimators):
+            yield f"base:{name}", est
+        yield "meta", model.final_estimator_
+
+
+def instrument(model):
+    """Time every base learner, the meta-learner and the model itself; returns the wrapped components."""
+    done = {}
+    for component, obj in _components(model):
+        methods = _wrap(obj, component)
+        if methods:
+            done[component] = methods
+    return done
+
+
+def uninstrument(model):
+    for _, obj in _components(model):
+        for method in PROFILED_METHODS:
+            vars(obj).pop(method, None)
+
+
+def is_instrumented(model):
+    return "predict_proba" in vars(model) or "predict" in vars(model)
+
+
+# -------------------------
+# Shared, reference-counted switch
+# -------------------------
+_refs_lock = threading.Lock()
+_model_refs = {}  # id(model) -> [model, holders]
+
+
+def acquire(model=None):
+    """Turn profiling on for one more holder and instrument `model` if it is the first."""
+    with _refs_lock:
+        profiler.holders += 1
+        if model is not None:
+            entry = _model_refs.setdefault(id(model), [model, 0])
+            if entry[1] == 0:
+                instrument(model)
+            entry[1] += 1
+
+
+def release(model=None):
+    """Undo one acquire(); the last holder of `model` removes its instrumentation."""
+    with _refs_lock:
+        profiler.holders = max(profiler.holders - 1, 0)
+        entry = _model_refs.get(id(model)) if model is not None else None
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                if not profiler.always_on:  # loaded instrumented under MLINCS_PROFILE=1: keep it
+                    uninstrument(model)
+                del _model_refs[id(model)]
@@ -0,0 +1,172 @@
+# rescore.py
+# Nightly rescoring that only scores students whose inputs changed.
+#
+# Every (student_id, time span) row is fingerprinted by a hash of its 16
+# raw inputs (15 counters + which_time_span_encoded). Scores are kept in a
+# SQLite store together with that hash, the model content hash and the
+# threshold. A run scores only rows that are new, whose inputs changed,
+# or that were scored by a different model/threshold; everything else is
+# skipped.
+#
+#   python rescore.py ds1.csv                       # CSV or Parquet cohort
+#   python rescore.py --from-aggregator .cache/student_counters.sqlite
+#   python rescore.py ds1.csv --export scores.csv   # dump the whole store
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+import model_store
+from batch_scoring import CHUNK_SIZE
+from evaluation import CACHE_DIR
+from features import build_feature_frame, raw_matrix
+from inference import DEFAULT_THRESHOLD, predict_with_proba
+
+DEFAULT_DB_PATH = os.path.join(CACHE_DIR, "scores.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    student_id  TEXT NOT NULL,
+    span        INTEGER NOT NULL,
+    input_hash  TEXT NOT NULL,
+    model_hash  TEXT NOT NULL,
+    threshold   REAL NOT NULL,
+    label,
+    probability REAL,
+    scored_at   REAL NOT NULL,
+    PRIMARY KEY (student_id, span)
+) WITHOUT ROWID;
+"""
+
+
+def row_hashes(raw):
+    """Stable hex digest per row of an (N, 16) raw array."""
+    raw = np.ascontiguousarray(raw, dtype="<f8")
+    return [hashlib.blake2b(row.tobytes(), digest_size=16).hexdigest() for row in raw]
+
+
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class ScoreStore:
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def lookup(self, keys):
+        """{(student_id, span): (input_hash, model_hash, threshold)} for the keys present."""
+        found = {}
+        students = sorted({k[0] for k in keys})
+        for i in range(0, len(students), 500):
+            part = students[i:i + 500]
+            rows = self._conn.execute(
+                f"SELECT student_id, span, input_hash, model_hash, threshold FROM scores "
+                f"WHERE student_id IN ({','.join('?' * len(part))})", part)
+            found.update(((s, sp), (h, m, t)) for s, sp, h, m, t in rows if (s, sp) in keys)
+        return found
+
+    def upsert(self, rows):
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def frame(self):
+        import pandas as pd
+
+        return pd.read_sql_query("SELECT * FROM scores ORDER BY student_id, span", self._conn)
+
+
+def rescore_chunks(chunks, store, model_path=model_store.DEFAULT_MODEL_PATH, threshold=None, log=print):
+    """Score only changed rows of ds1.csv-shaped chunks; returns skipped/rescored/new counts."""
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLD
+    model = model_store.load_model(model_path)
+    model_hash = model_store.model_hash(model_path)
+    counts = {"rows": 0, "skipped": 0, "new": 0, "rescored": 0,
+              "rescored_input_changed": 0, "rescored_model_changed": 0}
+    start = time.perf_counter()
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        if "student_id" not in chunk.columns:
+            raise ValueError("rescoring needs a student_id column to track rows between runs")
+        raw = raw_matrix(chunk)
+        hashes = row_hashes(raw)
+        keys = list(zip(chunk["student_id"].astype(str), raw[:, 15].astype(int).tolist()))
+        keys_last = {k: i for i, k in enumerate(keys)}  # same student/span twice: last row wins
+        previous = store.lookup(set(keys))
+
+        todo = []
+        for key, i in keys_last.items():
+            old = previous.get(key)
+            if old is None:
+                counts["new"] += 1
+            elif old[0] != hashes[i]:
+                counts["rescored_input_changed"] += 1
+            elif old[1] != model_hash or old[2] != float(threshold):
+                counts["rescored_model_changed"] += 1
+            else:
+                counts["skipped"] += 1
+                continue
+            todo.append(i)
+        counts["rows"] += len(keys_last)
+
+        if todo:
+            labels, proba = predict_with_proba(model, build_feature_frame(raw[todo]), threshold)
+            now = time.time()
+            store.upsert([
+                (keys[i][0], keys[i][1], hashes[i], model_hash, float(threshold), _plain(labels[j]),
+                 None if proba is None else float(proba[j]), now)
+                for j, i in enumerate(todo)])
+    counts["rescored"] = counts["rescored_input_changed"] + counts["rescored_model_changed"]
+    counts["seconds"] = time.perf_counter() - start
+    if log:
+        log(f"{counts['rows']:,} rows: {counts['skipped']:,} skipped, {counts['rescored']:,} rescored "
+            f"({counts['rescored_input_changed']:,} changed inputs, {counts['rescored_model_changed']:,} "
+            f"model/threshold change), {counts['new']:,} new in {counts['seconds']:.2f}s")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rescore only students whose inputs or the model changed.")
+    parser.add_argument("input", nargs="?", help="ds1.csv-shaped cohort (.csv or .parquet) with student_id")
+    parser.add_argument("--from-aggregator", metavar="DB", help="read rows from an event_aggregator store instead")
+    parser.add_argument("--model", default=model_store.DEFAULT_MODEL_PATH)
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="score store (default: %(default)s)")
+    parser.add_argument("--threshold", type=float, default=None, help="Pass probability threshold")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--export", metavar="CSV", help="write every stored score to this CSV")
+    args = parser.parse_args(argv)
+    if not args.input and not args.from_aggregator:
+        parser.error("give an input file or --from-aggregator")
+
+    if args.from_aggregator:
+        from event_aggregator import EventAggregator
+        agg = EventAggregator(args.from_aggregator)
+        chunks = [agg.frame()]
+        agg.close()
+    else:
+        from score_cohort import iter_input_chunks
+        chunks = iter_input_chunks(args.input, args.chunk_size)
+
+    store = ScoreStore(args.db)
+    try:
+        counts = rescore_chunks(chunks, store, args.model, args.threshold)
+        print(json.dumps(counts, indent=2))
+        if args.export:
+            store.frame().to_csv(args.export, index=False)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
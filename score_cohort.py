@@ -0,0 +1,185 @@
+# score_cohort.py
+# Headless batch scorer for nightly runs.
+#
+#   python score_cohort.py ds1.csv scores.csv
+#   python score_cohort.py students.parquet scores.parquet --workers 16 --chunk-size 20000
+#
+# The input (CSV or Parquet with the ds1.csv columns) is read in chunks and
+# the chunks are sharded across a process pool. Every worker loads the model
+# once, through model_store, and keeps it for the whole run. Scored chunks
+# are written out incrementally in input order, and at most a few chunks per
+# worker are in flight, so memory stays bounded regardless of input size.
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_scoring import CHUNK_SIZE, INPUT_COLUMNS, read_csv_chunks, score_frame
+from model_store import DEFAULT_MODEL_PATH
+
+_worker = {}
+
+
+# -------------------------
+# Readers / writers
+# -------------------------
+def _is_parquet(path):
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def iter_input_chunks(path, chunk_size=CHUNK_SIZE):
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        pf = pq.ParquetFile(path)
+        columns = [c for c in pf.schema_arrow.names if c in INPUT_COLUMNS]
+        for batch in pf.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from read_csv_chunks(path, chunk_size)
+
+
+class _CsvSink:
+    def __init__(self, path):
+        self._f = open(path, "w", newline="")
+        self._header = True
+
+    def write(self, df):
+        df.to_csv(self._f, header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        self._f.close()
+
+
+class _ParquetSink:
+    def __init__(self, path):
+        self._path = path
+        self._writer = None
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_sink(path):
+    return _ParquetSink(path) if _is_parquet(path) else _CsvSink(path)
+
+
+# -------------------------
+# Worker side
+# -------------------------
+def _init_worker(model_path, threshold):
+    # One process per core: keep BLAS/OpenMP pools inside each worker single-threaded
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+    from model_store import load_model
+    start = time.perf_counter()
+    _worker["model"] = load_model(model_path)
+    _worker["threshold"] = threshold
+    _worker["load_seconds"] = time.perf_counter() - start
+
+
+def _score_chunk(chunk):
+    # same scoring path as the Batch Scoring tab (features + ensemble + threshold)
+    start = time.perf_counter()
+    scored = score_frame(_worker["model"], chunk, _worker["threshold"])
+    timings = {"scoring": time.perf_counter() - start, "model_load": _worker.pop("load_seconds", 0.0)}
+    return scored, timings
+
+
+# -------------------------
+# Driver
+# -------------------------
+def score_file(input_path, output_path, model_path=DEFAULT_MODEL_PATH, workers=None,
+               chunk_size=CHUNK_SIZE, threshold=None, log=print):
+    """Score `input_path` into `output_path`; returns a dict of run statistics."""
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    stages = {"read": 0.0, "scoring": 0.0, "model_load": 0.0, "write": 0.0}
+    n_rows = 0
+    n_chunks = 0
+
+    def drain(pending, sink, block):
+        nonlocal n_rows, n_chunks
+        while pending and (block or pending[0].done()):
+            scored, timings = pending.popleft().result()
+            for k, v in timings.items():
+                stages[k] += v
+            t = time.perf_counter()
+            sink.write(scored)
+            stages["write"] += time.perf_counter() - t
+            n_rows += len(scored)
+            n_chunks += 1
+
+    start = time.perf_counter()
+    sink = open_sink(output_path)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_path, threshold)) as pool:
+            pending = deque()
+            chunks = iter_input_chunks(input_path, chunk_size)
+            while True:
+                t = time.perf_counter()
+                chunk = next(chunks, None)
+                stages["read"] += time.perf_counter() - t
+                if chunk is None:
+                    break
+                if len(chunk):
+                    pending.append(pool.submit(_score_chunk, chunk))
+                drain(pending, sink, block=False)
+                while len(pending) >= max_in_flight:
+                    pending[0].result()  # wait for the oldest chunk, then flush whatever is ready
+                    drain(pending, sink, block=False)
+            drain(pending, sink, block=True)
+    finally:
+        sink.close()
+    wall = time.perf_counter() - start
+
+    stats = {
+        "rows": n_rows,
+        "chunks": n_chunks,
+        "workers": workers,
+        "wall_seconds": wall,
+        "rows_per_second": n_rows / wall if wall > 0 else 0.0,
+        # worker-side stages are summed over all workers (CPU-seconds)
+        "stage_seconds": stages,
+    }
+    if log:
+        log(f"Scored {n_rows:,} rows in {n_chunks} chunks with {workers} workers: "
+            f"{wall:.2f}s wall, {stats['rows_per_second']:,.0f} rows/s")
+        for name, secs in stages.items():
+            log(f"  {name:<10} {secs:8.3f}s")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a ds1.csv-shaped CSV/Parquet file with the stacking model.")
+    parser.add_argument("input", help="raw counter file (.csv or .parquet)")
+    parser.add_argument("output", help="destination for student_id,label,probability (.csv or .parquet)")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="model artifact (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows per chunk (default: %(default)s)")
+    parser.add_argument("--threshold", type=float, default=None, help="Pass probability threshold")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.model):
+        parser.error(f"model file not found: {args.model}")
+    score_file(args.input, args.output, args.model, args.workers, args.chunk_size, args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
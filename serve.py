@@ -0,0 +1,335 @@
+# serve.py
+# Local HTTP prediction service around the stacking model.
+#
+#   python serve.py                      # serve on 127.0.0.1:8765
+#   python serve.py --load-test 2000     # start a server and compare throughput
+#
+# POST /predict accepts one student or a batch:
+#   {"total_easy_exercise": 10, ..., "which_time_span": "Mid"}
+#   {"instances": [{...}, {...}]}      or a bare list of objects / 16-value lists
+# and answers {"predictions": [{"label": 1, "probability": 0.87}, ...]}.
+#
+# Concurrent requests are coalesced by a MicroBatcher: the first request in
+# an empty queue waits at most `max_wait_ms` for others to arrive, then the
+# whole batch goes through one feature build and one ensemble pass. Rows
+# are validated before they are queued (finite, non-negative counters, time
+# span 1/2/3), and a batch that still fails is retried request by request,
+# so one bad request cannot fail the others coalesced with it.
+# GET /stats reports request latency percentiles and batch sizes;
+# GET /metrics the same registry as the Streamlit pages (metrics.py).
+# --parallel-stack thread|process runs the base learners concurrently
+# (see parallel_stack.py).
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import metrics
+from features import RAW_COLUMNS, TIME_SPAN_MAPPING, build_feature_frame
+from inference import predict_with_proba
+from model_store import DEFAULT_MODEL_PATH, load_model
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+# -------------------------
+# Payload parsing
+# -------------------------
+_SPAN_CODES = set(TIME_SPAN_MAPPING.values())
+
+
+def _checked(row):
+    """Reject non-finite or negative counters and unknown time spans (json.loads accepts NaN/Infinity)."""
+    if not all(np.isfinite(v) for v in row):
+        raise ValueError("values must be finite numbers")
+    negative = [c for c, v in zip(RAW_COLUMNS, row) if v < 0]
+    if negative:
+        raise ValueError(f"negative values for: {', '.join(negative)}")
+    if row[-1] not in _SPAN_CODES:
+        raise ValueError(f"unknown time span {row[-1]:g}; expected Early/Mid/End or 1/2/3")
+    return row
+
+
+def _instance_to_row(instance):
+    if isinstance(instance, (list, tuple)):
+        if len(instance) != len(RAW_COLUMNS):
+            raise ValueError(f"expected {len(RAW_COLUMNS)} values per instance, got {len(instance)}")
+        return _checked([float(v) for v in instance])
+    if not isinstance(instance, dict):
+        raise ValueError("each instance must be an object or a list of numbers")
+    instance = dict(instance)
+    if "which_time_span_encoded" not in instance and "which_time_span" in instance:
+        span = instance.pop("which_time_span")
+        instance["which_time_span_encoded"] = TIME_SPAN_MAPPING.get(str(span).strip().title(), span)
+    missing = [c for c in RAW_COLUMNS if c not in instance]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    return _checked([float(instance[c]) for c in RAW_COLUMNS])
+
+
+def parse_payload(payload):
+    """Return an (N, 16) raw array from a single or batched JSON payload."""
+    if isinstance(payload, dict) and "instances" in payload:
+        instances = payload["instances"]
+    elif isinstance(payload, list) and payload and isinstance(payload[0], (dict, list)):
+        instances = payload
+    else:
+        instances = [payload]
+    if not instances:
+        raise ValueError("no instances in payload")
+    return np.array([_instance_to_row(i) for i in instances], dtype=np.float64)
+
+
+# -------------------------
+# Micro-batching
+# -------------------------
+class MicroBatcher:
+    """Coalesce concurrent predict calls into vectorized model calls."""
+
+    def __init__(self, model, max_batch=256, max_wait_ms=5.0, threshold=None):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.threshold = threshold
+        self.batch_sizes = deque(maxlen=10000)
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, raw):
+        fut = Future()
+        self._queue.put((raw, fut))
+        return fut
+
+    def predict(self, raw):
+        return self.submit(raw).result()
+
+    def _collect(self):
+        items = [self._queue.get()]
+        rows = len(items[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            rows += len(item[0])
+        return items
+
+    def _predict(self, raw):
+        return predict_with_proba(self.model, build_feature_frame(raw), self.threshold)
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            try:
+                raw = np.concatenate([r for r, _ in items])
+                labels, proba = self._predict(raw)
+            except Exception as e:
+                if len(items) == 1:
+                    items[0][1].set_exception(e)
+                    continue
+                # isolate the failing request(s): the rest still get their predictions
+                for r, fut in items:
+                    try:
+                        fut.set_result(self._predict(r))
+                    except Exception as item_error:
+                        fut.set_exception(item_error)
+                continue
+            self.batch_sizes.append(len(raw))
+            start = 0
+            for r, fut in items:
+                end = start + len(r)
+                fut.set_result((labels[start:end], None if proba is None else proba[start:end]))
+                start = end
+
+
+class LatencyRecorder:
+    def __init__(self, window=10000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def percentiles(self, qs=(50, 90, 95, 99)):
+        with self._lock:
+            samples = np.array(self._samples)
+        if not len(samples):
+            return {}
+        values = np.percentile(samples * 1000.0, qs)
+        return {f"p{q}_ms": float(v) for q, v in zip(qs, values)}
+
+
+# -------------------------
+# HTTP layer
+# -------------------------
+def _to_json_value(v):
+    return v.item() if hasattr(v, "item") else v
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    server_version = "MLinCSPredict/1.0"
+
+    def log_message(self, format, *args):
+        pass  # keep the console quiet under load
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/stats":
+            sizes = np.array(self.server.batcher.batch_sizes)
+            self._send_json(200, {
+                "requests": self.server.latency.count,
+                "latency": self.server.latency.percentiles(),
+                "batches": int(len(sizes)),
+                "mean_batch_size": float(sizes.mean()) if len(sizes) else 0.0,
+            })
+        elif self.path == "/metrics":
+            data = metrics.REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", metrics.CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": "not found"})
+            return
+        start = time.perf_counter()
+        metrics.REQUESTS.labels(page="serve").inc()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            raw = parse_payload(json.loads(self.rfile.read(length) or b"null"))
+        except (ValueError, TypeError) as e:
+            metrics.ERRORS.labels(page="serve", error=type(e).__name__).inc()
+            self._send_json(400, {"error": str(e)})
+            return
+        try:
+            labels, proba = self.server.batcher.predict(raw)
+        except Exception as e:
+            metrics.ERRORS.labels(page="serve", error=type(e).__name__).inc()
+            self._send_json(500, {"error": f"prediction failed: {e}"})
+            return
+        predictions = [
+            {"label": _to_json_value(labels[i]), "probability": None if proba is None else float(proba[i])}
+            for i in range(len(labels))
+        ]
+        self._send_json(200, {"predictions": predictions})
+        self.server.latency.record(time.perf_counter() - start)
+        metrics.REQUEST_SECONDS.labels(page="serve").observe(time.perf_counter() - start)
+
+
+def make_server(model, host=DEFAULT_HOST, port=DEFAULT_PORT, max_batch=256, max_wait_ms=5.0, threshold=None):
+    server = ThreadingHTTPServer((host, port), PredictionHandler)
+    server.daemon_threads = True
+    server.batcher = MicroBatcher(model, max_batch, max_wait_ms, threshold)
+    server.latency = LatencyRecorder()
+    return server
+
+
+# -------------------------
+# Load test
+# -------------------------
+def load_test(model, n_requests=2000, concurrency=32, max_batch=256, max_wait_ms=5.0, seed=0):
+    """Compare one-row-at-a-time scoring with concurrent requests to a local server."""
+    import urllib.request
+    from concurrent.futures import ThreadPoolExecutor
+
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, 40, size=(n_requests, len(RAW_COLUMNS))).astype(float)
+    rows[:, 15] = rng.integers(1, 4, size=n_requests)
+
+    start = time.perf_counter()
+    for row in rows:
+        predict_with_proba(model, build_feature_frame(row))
+    sequential = n_requests / (time.perf_counter() - start)
+
+    server = make_server(model, port=0, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://{server.server_address[0]}:{server.server_address[1]}/predict"
+
+    def post(row):
+        req = urllib.request.Request(url, data=json.dumps([row.tolist()]).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req) as resp:
+            resp.read()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(post, rows))
+    served = n_requests / (time.perf_counter() - start)
+    sizes = np.array(server.batcher.batch_sizes)
+    report = {
+        "sequential_rows_per_second": sequential,
+        "served_rows_per_second": served,
+        "speedup": served / sequential,
+        "mean_batch_size": float(sizes.mean()) if len(sizes) else 0.0,
+        "latency": server.latency.percentiles(),
+    }
+    server.shutdown()
+    server.server_close()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP prediction service with request micro-batching.")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch", type=int, default=256, help="max rows per model call")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="max time a request waits for batch-mates")
+    parser.add_argument("--threshold", type=float, default=None, help="Pass probability threshold")
+    parser.add_argument("--load-test", type=int, metavar="N", help="run N concurrent requests against a local server and exit")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--parallel-stack", choices=["thread", "process"],
+                        help="evaluate the stacking base learners concurrently")
+    parser.add_argument("--stack-workers", type=int, default=None, help="pool size for --parallel-stack")
+    args = parser.parse_args(argv)
+
+    model = load_model(args.model)
+    if args.parallel_stack:
+        from parallel_stack import ParallelStacking
+        model = ParallelStacking(model, args.parallel_stack, args.stack_workers, args.model)
+    if args.load_test:
+        report = load_test(model, args.load_test, args.concurrency, args.max_batch, args.max_wait_ms)
+        print(json.dumps(report, indent=2))
+        return
+
+    server = make_server(model, args.host, args.port, args.max_batch, args.max_wait_ms, args.threshold)
+    print(f"Serving predictions on http://{args.host}:{args.port}/predict")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
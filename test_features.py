@@ -0,0 +1,44 @@
+# test_features.py
+# Parity of the vectorized feature builder with the training formulas.
+#
+#   python -m pytest -q test_features.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import (COUNTER_COLUMNS, FEATURE_COLUMNS, RAW_COLUMNS, _training_features, build_features,
+                      check_parity, raw_matrix)
+
+
+def test_parity_with_training_formulas():
+    assert check_parity(n_rows=2000, seed=1) <= 1e-12
+
+
+def test_zero_total_and_zero_completed_rows():
+    raw = np.zeros((3, len(RAW_COLUMNS)))
+    raw[:, 15] = [1, 2, 3]
+    raw[1, :5] = [0, 0, 30, 4, 2]    # nothing assigned, but time/attempts/errors recorded
+    raw[2, :5] = [5, 0, 0, 7, 3]     # assigned, nothing completed
+    got = build_features(raw)
+    expected = _training_features(pd.DataFrame(raw, columns=RAW_COLUMNS)).to_numpy(dtype=np.float64)
+    np.testing.assert_allclose(got, expected, rtol=0, atol=1e-12)
+
+    col = {c: i for i, c in enumerate(FEATURE_COLUMNS)}
+    assert got[1, col["easy_completion_ratio"]] == 0.0
+    assert got[2, col["easy_completion_ratio"]] == 0.0
+    assert got[1, col["easy_effort_efficiency"]] == 30.0
+    assert got[2, col["easy_error_rate"]] == 3 / 8
+    assert np.isfinite(got).all()
+
+
+def test_raw_matrix_maps_time_span_labels():
+    df = pd.DataFrame({c: [1, 2, 3] for c in COUNTER_COLUMNS})
+    df["which_time_span"] = ["Early", " mid ", "END"]
+    np.testing.assert_array_equal(raw_matrix(df)[:, 15], [1.0, 2.0, 3.0])
+
+    df["which_time_span"] = [1, 2, 3]
+    np.testing.assert_array_equal(raw_matrix(df)[:, 15], [1.0, 2.0, 3.0])
+
+    df["which_time_span"] = ["Early", "Late", "End"]
+    with pytest.raises(ValueError):
+        raw_matrix(df)
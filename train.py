@@ -0,0 +1,417 @@
+# train.py
+# Reproducible training pipeline: ds1.csv -> engineered_ds1.csv -> tuned
+# model zoo -> stacking_model.pkl (the Steps 1-4.2 described in accept1.py).
+# engineered_ds1.csv and holdout_ds1.csv are written under --workdir; point
+# HOLDOUT_PATH at the latter for the live evaluation dashboards.
+#
+#   python train.py --data ds1.csv
+#   python train.py --data ds1.csv --no-resume --n-jobs 8
+#
+# * GridSearchCV runs folds and candidates in parallel (n_jobs) and the
+#   StandardScaler inside each pipeline is cached with joblib.Memory, so a
+#   fold's fitted preprocessing is reused by every grid candidate.
+# * Every stage writes a marker with its result under --workdir. The marker
+#   is fingerprinted with the data hash and the stage's own inputs (tuning:
+#   estimator and grid; stack: output path, base learners and their tuned
+#   params), and a stage whose output files are missing runs again. A rerun
+#   skips only stages whose inputs are unchanged, so an interrupted run
+#   resumes where it stopped (tuning resumes per model) while e.g. a new
+#   --output or a --search halving rerun refits the stack.
+# * Wall-clock time per stage is printed and saved to timings.json.
+# * --search halving tunes with successive halving over training samples
+#   instead of the exhaustive grid; --search compare runs both and writes
+#   search_comparison.csv (fits, wall time, Best CV F1 per model).
+# * --latency-profile also trains cheaper stacking variants (base-learner
+#   subsets, fewer trees), benchmarks their latency and writes pareto.csv
+#   (see latency_profile.py).
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+import model_store
+from evaluation import HOLDOUT_PATH, TARGET_COLUMN, dataset_file_hash, encode_target, evaluate_model
+from features import build_feature_frame, raw_matrix
+
+RANDOM_STATE = 42
+CV_FOLDS = 5
+TEST_SIZE = 0.2
+DEFAULT_WORKDIR = os.path.join(".cache", "train")
+ENGINEERED_PATH = "engineered_ds1.csv"
+STACK_BASE_LEARNERS = ["RandomForest", "GradientBoosting", "MLP", "SVM", "XGBoost"]
+SEARCH_MODES = ["grid", "halving", "compare"]
+HALVING_FACTOR = 3
+
+
+# -------------------------
+# Model zoo
+# -------------------------
+def model_zoo():
+    """name -> (estimator, parameter grid for the `model` step of the pipeline)."""
+    from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.neural_network import MLPClassifier
+    from sklearn.svm import SVC
+
+    zoo = {
+        "LogisticRegression": (LogisticRegression(max_iter=2000, solver="liblinear"),
+                               {"model__C": [0.01, 0.1, 1, 10]}),
+        "RandomForest": (RandomForestClassifier(random_state=RANDOM_STATE),
+                         {"model__n_estimators": [200, 400], "model__max_depth": [None, 10, 20],
+                          "model__min_samples_leaf": [1, 3]}),
+        "GradientBoosting": (GradientBoostingClassifier(random_state=RANDOM_STATE),
+                             {"model__n_estimators": [100, 200], "model__learning_rate": [0.05, 0.1],
+                              "model__max_depth": [2, 3]}),
+        "MLP": (MLPClassifier(max_iter=1000, random_state=RANDOM_STATE),
+                {"model__hidden_layer_sizes": [(64,), (64, 32)], "model__alpha": [1e-4, 1e-3]}),
+        "SVM": (SVC(probability=True, random_state=RANDOM_STATE),
+                {"model__C": [0.1, 1, 10], "model__gamma": ["scale", 0.01]}),
+    }
+    try:
+        from xgboost import XGBClassifier
+    except ImportError:
+        print("xgboost not installed: skipping XGBoost", file=sys.stderr)
+    else:
+        # one thread per fit: GridSearchCV already parallelizes across cores
+        zoo["XGBoost"] = (XGBClassifier(eval_metric="logloss", random_state=RANDOM_STATE, n_jobs=1),
+                          {"model__n_estimators": [200, 400], "model__max_depth": [3, 5],
+                           "model__learning_rate": [0.05, 0.1]})
+    return zoo
+
+
+def make_pipeline(estimator, memory=None):
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+    return Pipeline([("scaler", StandardScaler()), ("model", estimator)], memory=memory)
+
+
+def cv_splitter(seed=RANDOM_STATE):
+    from sklearn.model_selection import StratifiedKFold
+    return StratifiedKFold(n_splits=CV_FOLDS, shuffle=True, random_state=seed)
+
+
+def holdout_metrics(estimator, X, y):
+    """evaluation.evaluate_model at threshold 0.5, under the model_results.csv column names."""
+    report = evaluate_model(estimator, X, y, threshold=0.5)
+    return {"Accuracy": report["accuracy"], "Precision": report["precision"], "Recall": report["recall"],
+            "F1": report["f1"], "ROC_AUC": report["roc_auc"]}
+
+
+# -------------------------
+# Stage bookkeeping
+# -------------------------
+class StageRunner:
+    """Runs named stages once per fingerprint and records their wall time.
+
+    A stage's fingerprint is the run-wide one (data, seed, folds, split)
+    plus a hash of the `inputs` it is given; `outputs` are files it must
+    have produced for a marker to count.
+    """
+
+    def __init__(self, workdir, fingerprint, resume=True, log=print):
+        self.workdir = workdir
+        self.fingerprint = fingerprint
+        self.resume = resume
+        self.log = log
+        self.timings = {}
+        os.makedirs(os.path.join(workdir, "stages"), exist_ok=True)
+
+    def _marker(self, name):
+        return os.path.join(self.workdir, "stages", name.replace(":", "__") + ".json")
+
+    def stage_fingerprint(self, inputs=None):
+        if inputs is None:
+            return self.fingerprint
+        digest = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+        return f"{self.fingerprint}:{digest[:16]}"
+
+    def run(self, name, fn, inputs=None, outputs=()):
+        marker = self._marker(name)
+        fingerprint = self.stage_fingerprint(inputs)
+        if self.resume and os.path.exists(marker) and all(os.path.exists(p) for p in outputs):
+            with open(marker) as f:
+                done = json.load(f)
+            if done.get("fingerprint") == fingerprint:
+                self.log(f"[{name}] already done ({done['seconds']:.1f}s), skipping")
+                self.timings[name] = {"seconds": done["seconds"], "skipped": True}
+                return done["result"]
+
+        self.log(f"[{name}] running...")
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        with open(marker + ".tmp", "w") as f:
+            json.dump({"fingerprint": fingerprint, "seconds": seconds, "result": result}, f, default=str)
+        os.replace(marker + ".tmp", marker)
+        self.timings[name] = {"seconds": seconds, "skipped": False}
+        self.log(f"[{name}] done in {seconds:.1f}s")
+        return result
+
+    def save_timings(self):
+        with open(os.path.join(self.workdir, "timings.json"), "w") as f:
+            json.dump(self.timings, f, indent=2)
+
+
+# -------------------------
+# Data
+# -------------------------
+def prepare_data(data_path, workdir):
+    """Split ds1.csv into train/held-out rows and write engineered_ds1.csv.
+
+    Every output goes under `workdir`; the held-out file keeps the name the
+    evaluation dashboards expect (HOLDOUT_PATH), so they can be pointed at it.
+    """
+    from sklearn.model_selection import train_test_split
+
+    df = pd.read_csv(data_path)
+    df = df.dropna(subset=[TARGET_COLUMN])
+    y = encode_target(df[TARGET_COLUMN])
+
+    engineered = build_feature_frame(raw_matrix(df), index=df.index)
+    engineered[TARGET_COLUMN] = y
+    engineered_path = os.path.join(workdir, ENGINEERED_PATH)
+    engineered.to_csv(engineered_path, index=False)
+
+    train_df, holdout_df = train_test_split(df, test_size=TEST_SIZE, stratify=y, random_state=RANDOM_STATE)
+    paths = {"engineered": engineered_path, "train": os.path.join(workdir, "train_ds1.csv"),
+             "holdout": os.path.join(workdir, os.path.basename(HOLDOUT_PATH))}
+    train_df.to_csv(paths["train"], index=False)
+    holdout_df.to_csv(paths["holdout"], index=False)
+    return {"rows": len(df), "train_rows": len(train_df), "holdout_rows": len(holdout_df), **paths}
+
+
+def load_split(path):
+    df = pd.read_csv(path)
+    return build_feature_frame(raw_matrix(df)), encode_target(df[TARGET_COLUMN])
+
+
+def _json_params(params):
+    return {k: (list(v) if isinstance(v, tuple) else v) for k, v in params.items()}
+
+
+def _restore_params(params):
+    # JSON turns tuples (e.g. hidden_layer_sizes) into lists
+    return {k: (tuple(v) if isinstance(v, list) else v) for k, v in params.items()}
+
+
+# -------------------------
+# Stages
+# -------------------------
+def tune_model(name, estimator, grid, X, y, X_hold, y_hold, workdir, n_jobs, search="grid",
+               cv_cache=None, data_hash=None):
+    """Tune one model with the exhaustive grid or with successive halving.
+
+    Successive halving starts every candidate on a small sample of the
+    training rows and keeps the best 1/HALVING_FACTOR of them for each
+    round with HALVING_FACTOR times more rows; only the last round sees the
+    full training set.
+
+    With a `cv_cache` (cv_cache.CVCache) the exhaustive grid only fits the
+    (candidate, fold) pairs whose scores are not stored yet.
+    """
+    from joblib import Memory
+    from sklearn.model_selection import ParameterGrid
+
+    memory = Memory(os.path.join(workdir, "pipeline_cache"), verbose=0)
+    pipe = make_pipeline(estimator, memory=memory)
+    start = time.perf_counter()
+    if search == "grid" and cv_cache is not None:
+        from cv_cache import cached_grid_search
+        result = cached_grid_search(name, pipe, grid, X, y, cv_splitter(), data_hash, cv_cache, n_jobs)
+        search_seconds = time.perf_counter() - start
+        best_estimator, best_params, best_score = result["best_estimator"], result["best_params"], result["best_score"]
+        n_fits = len(result["cv_results"]) * CV_FOLDS
+        print(f"Fitting {CV_FOLDS} folds for each of {len(result['cv_results'])} candidates: "
+              f"{result['n_fits_computed']} fits computed, {result['n_fits_reused']} reused from the CV cache")
+    else:
+        best_estimator, best_params, best_score, n_fits = _run_searcher(pipe, grid, X, y, n_jobs, search)
+        search_seconds = time.perf_counter() - start
+
+    metrics = holdout_metrics(best_estimator, X_hold, y_hold)
+    print(f"Best CV F1: {best_score:.2f} Best params: {best_params}")
+    print("Test accuracy, precision, recall, f1, roc: " + " ".join(f"{v:.2f}" for v in metrics.values()))
+    return {"best_params": _json_params(best_params), "Best_CV_F1": float(best_score),
+            "n_candidates": len(ParameterGrid(grid)), "search": search, "n_fits": n_fits,
+            "search_seconds": search_seconds, **metrics}
+
+
+def _run_searcher(pipe, grid, X, y, n_jobs, search):
+    if search == "halving":
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.model_selection import HalvingGridSearchCV
+        searcher = HalvingGridSearchCV(pipe, grid, scoring="f1", cv=cv_splitter(), factor=HALVING_FACTOR,
+                                       resource="n_samples", min_resources="exhaust",
+                                       random_state=RANDOM_STATE, n_jobs=n_jobs, refit=True, verbose=1)
+    else:
+        from sklearn.model_selection import GridSearchCV
+        searcher = GridSearchCV(pipe, grid, scoring="f1", cv=cv_splitter(), n_jobs=n_jobs, refit=True, verbose=1)
+    searcher.fit(X, y)
+    n_fits = len(searcher.cv_results_["params"]) * CV_FOLDS
+    return searcher.best_estimator_, searcher.best_params_, searcher.best_score_, n_fits
+
+
+def tuned_pipeline(name, zoo, best_params):
+    from sklearn.base import clone
+    pipe = make_pipeline(clone(zoo[name][0]))
+    pipe.set_params(**_restore_params(best_params[name]))
+    return pipe
+
+
+def build_stacking(best_params, zoo, base_names=STACK_BASE_LEARNERS, n_jobs=-1):
+    from sklearn.ensemble import StackingClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    estimators = [(name, tuned_pipeline(name, zoo, best_params))
+                  for name in base_names if name in zoo and name in best_params]
+    return StackingClassifier(estimators=estimators, final_estimator=LogisticRegression(max_iter=2000),
+                              cv=cv_splitter(), stack_method="predict_proba", n_jobs=n_jobs)
+
+
+def fit_stacking(best_params, zoo, X, y, X_hold, y_hold, output_path, n_jobs):
+    import joblib
+
+    model = build_stacking(best_params, zoo, n_jobs=n_jobs)
+    model.fit(X, y)
+    report = evaluate_model(model, X_hold, y_hold, threshold=0.5)
+    joblib.dump(model, output_path, compress=3)
+    print("STACKING MODEL PERFORMANCE: " + ", ".join(
+        f"{k}={report[k]:.3f}" for k in ("accuracy", "precision", "recall", "f1", "roc_auc")))
+    return {"output": output_path, "base_learners": [n for n, _ in model.estimators],
+            **{k: report[k] for k in ("accuracy", "precision", "recall", "f1", "roc_auc")}}
+
+
+def run_meta_search(best_params, zoo, X, y, data_hash, workdir, n_jobs):
+    """Meta-learner / base-subset search on persisted out-of-fold predictions."""
+    from oof_store import OOFStore, meta_search
+
+    store = OOFStore()
+    start = time.perf_counter()
+    oof = {name: store.predictions(name, tuned_pipeline(name, zoo, best_params), X, y, cv_splitter(), data_hash, n_jobs)
+           for name in STACK_BASE_LEARNERS if name in zoo and name in best_params}
+    oof_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = meta_search(oof, y, n_jobs=n_jobs)
+    search_seconds = time.perf_counter() - start
+    pd.DataFrame(rows).to_csv(os.path.join(workdir, "meta_search.csv"), index=False)
+
+    print(f"OOF predictions: {store.hits} from store, {store.misses} computed ({oof_seconds:.1f}s)")
+    print(f"Meta search: {len(rows)} combinations in {search_seconds:.1f}s; top 5:")
+    print(pd.DataFrame(rows[:5]).to_string(index=False))
+    return rows
+
+
+# -------------------------
+# Driver
+# -------------------------
+def run_pipeline(data_path, output_path=model_store.DEFAULT_MODEL_PATH, workdir=DEFAULT_WORKDIR,
+                 n_jobs=-1, resume=True, models=None, meta_search=False, search="grid", use_cv_cache=True,
+                 latency_profile=False):
+    os.makedirs(workdir, exist_ok=True)
+    fingerprint = f"{dataset_file_hash(data_path)}:rs{RANDOM_STATE}:cv{CV_FOLDS}:test{TEST_SIZE}"
+    runner = StageRunner(workdir, fingerprint, resume)
+    wall = time.perf_counter()
+
+    prepare_outputs = [os.path.join(workdir, ENGINEERED_PATH), os.path.join(workdir, "train_ds1.csv"),
+                       os.path.join(workdir, os.path.basename(HOLDOUT_PATH))]
+    split = runner.run("prepare", lambda: prepare_data(data_path, workdir), outputs=prepare_outputs)
+    print(f"Held-out rows: {split['holdout']} (set HOLDOUT_PATH to it for the live dashboards)")
+    X, y = load_split(split["train"])
+    X_hold, y_hold = load_split(split["holdout"])
+
+    zoo = model_zoo()
+    names = [n for n in zoo if models is None or n in models]
+    train_hash = dataset_file_hash(split["train"])
+    # the exhaustive grid is the baseline of --search compare: it bypasses the
+    # CV cache so its fit count and wall time stay comparable across reruns
+    cache = None
+    if use_cv_cache and search != "compare":
+        from cv_cache import CVCache
+        cache = CVCache()
+    modes = ["grid", "halving"] if search == "compare" else [search]
+    tuned = {mode: {} for mode in modes}
+    for name in names:
+        estimator, grid = zoo[name]
+        for mode in modes:
+            print("=" * 80)
+            print(f"Tuning: {name}" + ("" if mode == "grid" else f" ({mode})"))
+            stage = f"tune:{name}" if mode == "grid" else f"tune-{mode}:{name}"
+            if search == "compare" and mode == "grid":
+                stage = f"tune-grid-uncached:{name}"
+            tuned[mode][name] = runner.run(stage, lambda: tune_model(
+                name, estimator, grid, X, y, X_hold, y_hold, workdir, n_jobs, mode, cache, train_hash),
+                inputs={"estimator": repr(estimator), "grid": grid, "search": mode})
+    if cache is not None:
+        print(f"CV cache: {cache.hits} fold scores reused, {cache.misses} computed")
+        cache.close()
+    # the exhaustive grid stays the baseline when comparing
+    results = tuned["grid"] if "grid" in tuned else tuned[search]
+
+    if search == "compare":
+        comparison = pd.DataFrame([
+            {"Model": n, "search": mode, "n_fits": tuned[mode][n].get("n_fits"),
+             "wall_seconds": tuned[mode][n].get("search_seconds"), "Best_CV_F1": tuned[mode][n]["Best_CV_F1"],
+             "F1": tuned[mode][n]["F1"], "ROC_AUC": tuned[mode][n]["ROC_AUC"]}
+            for n in names for mode in modes
+        ])
+        comparison.to_csv(os.path.join(workdir, "search_comparison.csv"), index=False)
+        print("\nExhaustive grid vs successive halving:")
+        print(comparison.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    summary = pd.DataFrame([{"Model": n, **{k: v for k, v in r.items() if k != "best_params"}}
+                            for n, r in results.items()])
+    summary.to_csv(os.path.join(workdir, "model_results.csv"), index=False)
+
+    best_params = {n: r["best_params"] for n, r in results.items()}
+    if meta_search:
+        runner.timings["meta_search"] = {"seconds": 0.0, "skipped": False}
+        start = time.perf_counter()
+        run_meta_search(best_params, zoo, X, y, train_hash, workdir, n_jobs)
+        runner.timings["meta_search"]["seconds"] = time.perf_counter() - start
+    stack_inputs = {"output": os.path.abspath(output_path),
+                    "base_learners": [n for n in STACK_BASE_LEARNERS if n in zoo and n in best_params],
+                    "best_params": {n: best_params[n] for n in sorted(best_params)}}
+    stack = runner.run("stack", lambda: fit_stacking(
+        best_params, zoo, X, y, X_hold, y_hold, output_path, n_jobs), inputs=stack_inputs, outputs=[output_path])
+    pareto = None
+    if latency_profile:
+        from latency_profile import run_latency_profile
+        pareto = run_latency_profile(best_params, zoo, X, y, X_hold, y_hold, workdir, runner, n_jobs)
+
+    runner.timings["total"] = {"seconds": time.perf_counter() - wall, "skipped": False}
+    runner.save_timings()
+    print("\nStage timings:")
+    for name, t in runner.timings.items():
+        print(f"  {name:<28} {t['seconds']:9.1f}s{'  (resumed)' if t['skipped'] else ''}")
+    return {"split": split, "models": results, "stack": stack, "pareto": pareto, "timings": runner.timings}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the model zoo and stacking ensemble from ds1.csv.")
+    parser.add_argument("--data", default="ds1.csv", help="ds1.csv-shaped training data (default: %(default)s)")
+    parser.add_argument("--output", default=model_store.DEFAULT_MODEL_PATH, help="model artifact (default: %(default)s)")
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR, help="stage outputs and caches (default: %(default)s)")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="parallel jobs for folds/candidates (default: all cores)")
+    parser.add_argument("--no-resume", action="store_true", help="rerun every stage even if already done")
+    parser.add_argument("--models", nargs="+", help="only tune these models")
+    parser.add_argument("--meta-search", action="store_true",
+                        help="search meta-learners and base-learner subsets on stored out-of-fold predictions")
+    parser.add_argument("--search", choices=SEARCH_MODES, default="grid",
+                        help="hyperparameter search: exhaustive grid, successive halving, or both compared (default: %(default)s)")
+    parser.add_argument("--no-cv-cache", action="store_true",
+                        help="use plain GridSearchCV instead of the content-addressed fold score cache "
+                             "(always the case for --search compare)")
+    parser.add_argument("--latency-profile", action="store_true",
+                        help="also train cheaper stacking variants and write an F1/ROC AUC vs latency Pareto table")
+    args = parser.parse_args(argv)
+
+    run_pipeline(args.data, args.output, args.workdir, args.n_jobs, not args.no_resume, args.models,
+                 args.meta_search, args.search, not args.no_cv_cache, args.latency_profile)
+
+
+if __name__ == "__main__":
+    main()
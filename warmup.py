@@ -0,0 +1,30 @@
+# warmup.py
+# Background warm-up of the prediction stack.
+#
+# This module deliberately imports nothing heavy: pages that only show
+# information can call start_background_warmup() after they have rendered,
+# and the ML libraries plus the model are loaded on a daemon thread. When the
+# user then opens the prediction page, model_store.load_model either returns
+# the already-loaded model or waits on the same lock for the warm-up to
+# finish, so the model is never deserialized twice.
+import threading
+
+_lock = threading.Lock()
+_threads = {}
+
+
+def _warm(model_path):
+    import model_store
+    import prediction_cache  # noqa: F401  (pulls in numpy/pandas/features)
+    model_store.load_model(model_path)
+
+
+def start_background_warmup(model_path="stacking_model.pkl"):
+    """Start loading `model_path` in the background, at most once per process."""
+    with _lock:
+        thread = _threads.get(model_path)
+        if thread is None:
+            thread = threading.Thread(target=_warm, args=(model_path,), name="model-warmup", daemon=True)
+            _threads[model_path] = thread
+            thread.start()
+    return thread